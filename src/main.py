@@ -1,26 +1,42 @@
-from fastapi import FastAPI, Form, Request, UploadFile, File
-from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
+from fastapi import FastAPI, Form, Query, Request, UploadFile, File
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse, PlainTextResponse, FileResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from recipe_scrapers import scrape_me
-from PIL import Image, ImageOps, ExifTags
-from io import BytesIO
+from fastapi.concurrency import run_in_threadpool
+from io import BytesIO, RawIOBase
 from datetime import datetime
-from pathlib import Path
-from urllib.parse import urlparse
-from collections import Counter
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+from collections import Counter, OrderedDict, deque
 from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
 from pydantic import BaseModel
-import yaml
 import os
-import glob
-import requests
 import time
+import glob
 import shutil
 import re
 import subprocess
 import html
 import socket
+import ipaddress
 import uuid
+import threading
+import asyncio
+import sqlite3
+import json
+import multiprocessing
+import hashlib
+import bisect
+import heapq
+import zlib
+import tarfile
+import tempfile
+import queue
+import importlib
+import argparse
+from importlib import metadata
 
 __version__ = "1.0.0"
 
@@ -31,8 +47,15 @@ app = FastAPI(
 
 # --- CONFIGURATION ---
 CONTENT_DIR = "/app/site/content/recipes"
-# Internal URL to check if Nginx has served the new build (Must match Nginx port)
-HUGO_INTERNAL_URL = "http://127.0.0.1:8080" 
+# Indexes, caches and cover originals. Kept outside CONTENT_DIR so Hugo never watches or publishes them.
+DATA_DIR = os.environ.get("LOCALTOAST_DATA_DIR", "/app/data")
+# Hugo's output folder (served by Nginx). We watch it to know when a change is live.
+PUBLIC_DIR = "/app/site/public"
+PUBLISH_TIMEOUT = 10 # Max seconds to wait for Hugo to render a change
+SQLITE_TIMEOUT = 30 # Seconds a worker waits for another worker's write lock
+METRICS_FLUSH_INTERVAL = 10 # Seconds between a worker's metrics snapshots (with several workers)
+# Adds a Server-Timing header (DNS, fetch, resize, encode, write, publish...) to every API response
+SERVER_TIMING = os.environ.get("LOCALTOAST_SERVER_TIMING", "").lower() in ("1", "true", "yes")
 templates = Jinja2Templates(directory="templates")
 
 # Browser headers to avoid 403 Forbidden on some recipe sites
@@ -45,13 +68,1132 @@ FAKE_BROWSER_HEADERS = {
 }
 
 # --- SECURITY LIMITS ---
-# Prevent decompression bombs
-Image.MAX_IMAGE_PIXELS = 90_000_000 
+IMAGE_MAX_PIXELS = 90_000_000 # Prevent decompression bombs (set on Pillow when it loads)
 BATCH_TIMEOUT = 3600
+MAX_BATCHES = 20 # Oldest staged batches are dropped beyond this
+SCRAPE_MAX_BYTES = 5 * 1024 * 1024 # Largest recipe page we'll download
+IMAGE_MAX_BYTES = 20 * 1024 * 1024 # Largest image we'll download (matches Nginx upload limit)
+IMAGE_PROBE_BYTES = 256 * 1024 # /test-image gives up if no image header shows up within this
+IMAGE_PROBE_TIMEOUT = 4
+RECIPE_MAX_BYTES = 1024 * 1024 # Largest index.md accepted from an imported archive
+
+# --- DNS ---
+DNS_TTL = 300 # Seconds a successful lookup is reused
+DNS_NEGATIVE_TTL = 30 # Seconds a failed or blocked lookup is remembered
+# Hosts allowed to resolve to private addresses (e.g. a recipe server on your LAN). Comma separated.
+TRUSTED_HOSTS = {h.strip().lower() for h in os.environ.get("LOCALTOAST_TRUSTED_HOSTS", "").split(",") if h.strip()}
+
+# --- HTTP CLIENT ---
+HTTP_POOL_SIZE = 10 # Keep-alive connections kept per host
+# Statuses that usually mean "bot detected" rather than "missing"; Curl's TLS fingerprint often gets through
+CURL_RETRY_STATUSES = {401, 403, 406, 429, 503}
+
+# --- IMAGE RENDITIONS ---
+# (suffix, width, height, jpeg quality, webp quality). Largest first; smaller sizes
+# with the same aspect ratio are derived from the previous rendition.
+COVER_SIZES = [("", 800, 600, 80, 80), ("_small", 400, 300, 50, 50)]
+# WebP encoder effort, 0 (fastest) to 6 (smallest files). 6 roughly doubles encode time over 4.
+WEBP_METHOD = int(os.environ.get("LOCALTOAST_WEBP_METHOD", "6"))
+# Extra sizes rendered on first request as /recipes/<slug>/cover_<w>x<h>.<jpg|webp>, then kept in the published folder
+RENDITION_SIZES = {
+    tuple(int(n) for n in size.split("x"))
+    for size in os.environ.get("LOCALTOAST_RENDITION_SIZES", "160x120,320x240,640x480,1200x900,1600x1200").split(",") if size.strip()
+}
+RENDITION_QUALITY = 75
+# Uvicorn worker processes (set by supervisord). Cores are split between their image pools.
+INGESTER_WORKERS = max(1, int(os.environ.get("INGESTER_WORKERS", "1")))
+IMAGE_WORKERS = max(1, (os.cpu_count() or 1) // INGESTER_WORKERS)
+SAVE_WORKERS = 4 # Recipes saved in parallel during /bulk-commit
+# Downloaded originals and rendered covers are reused across saves, renames and duplicates
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("LOCALTOAST_IMAGE_CACHE_MB", "512")) * 1024 * 1024
+IMAGE_URL_TTL = 30 * 86400 # Re-download an image URL after this long
+
+# --- SCRAPING ENGINE ---
+SCRAPE_WORKERS = 8 # Total URLs scraped in parallel during /bulk
+SCRAPE_PER_HOST = 2 # Be polite: max in-flight requests to any one site
+SCRAPE_DEADLINE = 20 # Seconds allowed per URL (download + parse)
+# Fetched pages are kept so re-staging a URL skips the network (revalidated with ETag/Last-Modified once stale)
+PAGE_CACHE_TTL = float(os.environ.get("LOCALTOAST_PAGE_CACHE_HOURS", "24")) * 3600
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("LOCALTOAST_PAGE_CACHE_MB", "64")) * 1024 * 1024
+# Query parameters that never change the page and only split the cache
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "_ga"}
+
+# --- ARCHIVES ---
+ARCHIVE_CHUNK = 256 * 1024 # Bytes read and sent at a time by /export and /import
+ARCHIVE_QUEUE = 16 # Upload chunks buffered ahead of the import (backpressure beyond this)
 
 # --- CACHE ---
-TAXONOMY_CACHE = {"tags": Counter()}
-PENDING_BATCHES = {}
+TAG_SUGGESTIONS = 50 # Most tags /tag-suggest returns at once
+RECIPE_CACHE_SIZE = 256 # Parsed recipes kept for /edit, /save and /delete
+
+# --- STARTUP ---
+STARTED = time.perf_counter() # Start of the startup profile, right after the imports
+INDEX_WAIT_TIMEOUT = 120 # Max seconds a request waits for the startup index sync
+
+class StartupProfile:
+    """Wall-clock timings of this worker's module setup, startup and background warm-up.
+
+    Times are measured from the end of main.py's imports. Printed once warm-up
+    finishes and served at /startup. `indexed` is set once the startup sync has
+    filled the recipe index.
+    """
+    def __init__(self, started):
+        self.started = started
+        self._lock = threading.Lock()
+        self.phases = [] # (phase, started at, seconds)
+        self.ready = None # Seconds until the API accepted requests
+        self.warmed = threading.Event()
+        self.indexed = threading.Event()
+
+    def since_start(self):
+        return time.perf_counter() - self.started
+
+    def record(self, phase, seconds):
+        with self._lock: self.phases.append((phase, self.since_start() - seconds, seconds))
+
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try: yield
+        finally: self.record(phase, time.perf_counter() - start)
+
+    def report(self):
+        ms = lambda seconds: round(seconds * 1000, 1)
+        with self._lock: phases = list(self.phases)
+        return {
+            "pid": os.getpid(),
+            "ready_ms": ms(self.ready) if self.ready is not None else None,
+            "warm": self.warmed.is_set(),
+            "phases": [{"phase": phase, "at_ms": ms(at), "ms": ms(seconds)} for phase, at, seconds in phases],
+        }
+
+STARTUP = StartupProfile(STARTED)
+
+class Lazy:
+    """Stands in for a heavy module (or object) and loads it on first attribute access.
+
+    recipe_scrapers alone imports hundreds of site modules, so the API (and every
+    spawned image worker) starts without it. The load shows up in the startup profile.
+    """
+    def __init__(self, name, load=None):
+        self._name = name
+        self._load = load or (lambda: importlib.import_module(name))
+        self._value = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    with STARTUP.timer(f"load {self._name}"): self._value = self._load()
+        return self._value
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+def load_pillow(name):
+    """Imports a Pillow module, with the decompression bomb limit in place first."""
+    from PIL import Image as pil_image
+    pil_image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+    return importlib.import_module(name)
+
+yaml = Lazy("yaml")
+requests = Lazy("requests")
+recipe_scrapers = Lazy("recipe_scrapers")
+Image = Lazy("PIL.Image", lambda: load_pillow("PIL.Image"))
+ImageFile = Lazy("PIL.ImageFile", lambda: load_pillow("PIL.ImageFile"))
+ImageOps = Lazy("PIL.ImageOps", lambda: load_pillow("PIL.ImageOps"))
+ExifTags = Lazy("PIL.ExifTags", lambda: load_pillow("PIL.ExifTags"))
+
+def scrape_html(html, org_url, **kwargs):
+    """recipe_scrapers.scrape_html; the library is imported on the first scrape."""
+    return recipe_scrapers.scrape_html(html, org_url=org_url, **kwargs)
+
+# --- METRICS ---
+REQUEST_TIMINGS = ContextVar("request_timings", default=None) # [(stage, seconds)] for Server-Timing
+
+class Metrics:
+    """In-process counters and histograms, served in the Prometheus text format at /metrics.
+
+    `timer(stage)` feeds localtoast_stage_seconds and, while a request is being
+    handled with Server-Timing enabled, that request's timing header. With several
+    ingester workers each one flushes its numbers to state.db and /metrics sums them.
+    """
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+    HELP = {
+        "localtoast_stage_seconds": ("histogram", "Time spent per pipeline stage"),
+        "localtoast_request_seconds": ("histogram", "API request latency by route"),
+        "localtoast_batch_size": ("histogram", "URLs per bulk batch"),
+        "localtoast_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+        "localtoast_fetched_bytes_total": ("counter", "Bytes downloaded from recipe sites"),
+        "localtoast_image_downloads_total": ("counter", "Image downloads by method and result"),
+        "localtoast_bulk_items_total": ("counter", "Bulk URLs staged, by result"),
+        "localtoast_publish_timeouts_total": ("counter", "Saves that gave up waiting for Hugo"),
+        "localtoast_import_bundles_total": ("counter", "Recipe bundles restored by /import, by result"),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {} # (name, labels) -> value
+        self._histograms = {} # (name, labels) -> [buckets, counts, sum, count]
+        self._db_lock = threading.Lock()
+        self._conn = None # state.db, shared with the other workers
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock: self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None: hist = self._histograms[key] = [buckets, [0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(hist[0]):
+                if value <= bound: hist[1][i] += 1
+            hist[2] += value
+            hist[3] += 1
+
+    def record(self, stage, seconds):
+        """Logs time spent in a stage (histogram plus the current request's Server-Timing)."""
+        self.observe("localtoast_stage_seconds", seconds, stage=stage)
+        timings = REQUEST_TIMINGS.get()
+        if timings is not None: timings.append((stage, seconds))
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try: yield
+        finally: self.record(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, labels, value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, labels, list(h[0]), list(h[1]), h[2], h[3]] for (name, labels), h in self._histograms.items()],
+            }
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = open_db(os.path.join(DATA_DIR, "state.db"), "CREATE TABLE IF NOT EXISTS metrics (pid INTEGER PRIMARY KEY, data TEXT, updated REAL)")
+        return self._conn
+
+    def flush(self):
+        """Shares this worker's numbers with the others (only when there are several)."""
+        if INGESTER_WORKERS == 1: return
+        data = json.dumps(self.snapshot())
+        try:
+            with self._db_lock:
+                db = self._db()
+                with db: db.execute("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?)", (os.getpid(), data, time.time()))
+        except sqlite3.Error as e: print(f"Warning: Could not share metrics: {e}", flush=True)
+
+    def collect(self):
+        """Snapshots of every worker, this one up to date."""
+        if INGESTER_WORKERS == 1: return [self.snapshot()]
+        self.flush()
+        try:
+            with self._db_lock:
+                rows = self._db().execute("SELECT pid, data FROM metrics").fetchall()
+        except sqlite3.Error: return [self.snapshot()]
+        return [json.loads(data) for _, data in rows]
+
+    def start_sharing(self):
+        """Forgets workers that are gone and flushes this one in the background."""
+        if INGESTER_WORKERS == 1: return
+        try:
+            with self._db_lock:
+                db = self._db()
+                for (pid,) in db.execute("SELECT pid FROM metrics").fetchall():
+                    try: os.kill(pid, 0)
+                    except ProcessLookupError:
+                        with db: db.execute("DELETE FROM metrics WHERE pid = ?", (pid,))
+                    except PermissionError: pass
+        except sqlite3.Error as e: print(f"Warning: Could not share metrics: {e}", flush=True)
+        def loop():
+            while True:
+                time.sleep(METRICS_FLUSH_INTERVAL)
+                self.flush()
+        threading.Thread(target=loop, name="metrics", daemon=True).start()
+
+    def render(self):
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs: return ""
+            escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+        counters, histograms = {}, {}
+        for snapshot in self.collect():
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, counts, total, count in snapshot["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                if key not in histograms: histograms[key] = [buckets, [0] * len(buckets), 0.0, 0]
+                merged = histograms[key]
+                merged[1] = [a + b for a, b in zip(merged[1], counts)]
+                merged[2] += total
+                merged[3] += count
+        lines, described = [], set()
+        def describe(name):
+            if name in described: return
+            described.add(name)
+            kind, text = self.HELP.get(name, ("untyped", name))
+            lines.extend([f"# HELP {name} {text}", f"# TYPE {name} {kind}"])
+        for (name, labels), value in sorted(counters.items()):
+            describe(name)
+            lines.append(f"{name}{fmt(labels)} {value}")
+        for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            describe(name)
+            for bound, n in zip(buckets, counts): lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {n}")
+            lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{fmt(labels)} {total}")
+            lines.append(f"{name}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+# --- DNS ---
+class SafeResolver:
+    """Cached DNS lookups that only return public addresses.
+
+    Answers are kept for `ttl` seconds and failures (or hosts pointing at private,
+    loopback, link-local or reserved IPv4/IPv6 ranges) for `negative_ttl`.
+    Concurrent lookups of the same host share one query. The HTTP session
+    connects to exactly the addresses returned here, so a host can't pass
+    validation and then rebind to an internal IP for the actual fetch.
+    """
+    MAX_ENTRIES = 2048
+
+    def __init__(self, ttl, negative_ttl, trusted=()):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.trusted = set(trusted)
+        self._lock = threading.Lock()
+        self._cache = {} # hostname -> (expires, [addresses] or None)
+        self._inflight = {} # hostname -> Event set when its lookup finishes
+
+    @staticmethod
+    def is_public(address):
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if ip.version == 6 and ip.ipv4_mapped: ip = ip.ipv4_mapped
+        return ip.is_global and not ip.is_multicast
+
+    def _filter(self, hostname, infos):
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        if hostname in self.trusted: return addresses or None
+        # One private answer is enough to refuse the whole host
+        return addresses if addresses and all(self.is_public(a) for a in addresses) else None
+
+    def _store(self, hostname, addresses):
+        with self._lock:
+            if len(self._cache) >= self.MAX_ENTRIES:
+                now = time.time()
+                self._cache = {h: e for h, e in self._cache.items() if e[0] > now}
+            self._cache[hostname] = (time.time() + (self.ttl if addresses else self.negative_ttl), addresses)
+        return addresses
+
+    def cached(self, hostname):
+        """Returns (hit, addresses) without doing a lookup."""
+        with self._lock:
+            entry = self._cache.get(hostname)
+        hit = bool(entry and entry[0] > time.time())
+        METRICS.inc("localtoast_cache_requests_total", cache="dns", result="hit" if hit else "miss")
+        return (True, entry[1]) if hit else (False, None)
+
+    def resolve(self, hostname):
+        """Returns the public addresses for a hostname, or None if it fails or isn't public."""
+        hostname = hostname.lower().rstrip('.')
+        while True:
+            hit, addresses = self.cached(hostname)
+            if hit: return addresses
+            with self._lock:
+                event = self._inflight.get(hostname)
+                if event is None: self._inflight[hostname] = event = threading.Event(); owner = True
+                else: owner = False
+            if not owner:
+                event.wait(10)
+                continue
+            try:
+                try:
+                    with METRICS.timer("dns"): infos = socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+                except (OSError, UnicodeError): infos = []
+                return self._store(hostname, self._filter(hostname, infos))
+            finally:
+                with self._lock: self._inflight.pop(hostname, None)
+                event.set()
+
+    async def resolve_async(self, hostname):
+        """Like resolve(), but uses the event loop's getaddrinfo instead of blocking it."""
+        hostname = hostname.lower().rstrip('.')
+        hit, addresses = self.cached(hostname)
+        if hit: return addresses
+        try:
+            with METRICS.timer("dns"): infos = await asyncio.get_running_loop().getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+        except (OSError, UnicodeError): infos = []
+        return self._store(hostname, self._filter(hostname, infos))
+
+RESOLVER = SafeResolver(DNS_TTL, DNS_NEGATIVE_TTL, TRUSTED_HOSTS)
+
+# --- HTTP CLIENT ---
+PIN_REFUSAL = "Refusing to connect to" # Error text of a connection SafeResolver blocked
+
+def refused_by_pin(error):
+    """True if a Requests error means SafeResolver blocked the host (e.g. a redirect to a private address)."""
+    return PIN_REFUSAL in str(error)
+
+def make_http_session():
+    """Builds the Requests session shared by scraping and image downloads (keep-alive per host).
+
+    Connections, including redirects, only go to addresses SafeResolver approved,
+    trying each in turn like a normal connect would. TLS still verifies the real hostname.
+    """
+    import urllib3
+
+    class PinnedHTTPConnection(urllib3.connection.HTTPConnection):
+        def _new_conn(self):
+            hostname = self._dns_host
+            addresses = RESOLVER.resolve(hostname)
+            if not addresses:
+                raise urllib3.exceptions.NewConnectionError(self, f"{PIN_REFUSAL} {hostname}: not a public address")
+            try:
+                # e.g. fall back to IPv4 when the container can't reach the IPv6 address
+                for address in addresses:
+                    self._dns_host = address
+                    try: return super()._new_conn()
+                    except urllib3.exceptions.ConnectTimeoutError as e: error = e # Also NewConnectionError
+                raise error
+            finally: self._dns_host = hostname
+
+    class PinnedHTTPSConnection(PinnedHTTPConnection, urllib3.connection.HTTPSConnection):
+        pass
+
+    class PinnedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+        ConnectionCls = PinnedHTTPConnection
+
+    class PinnedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+        ConnectionCls = PinnedHTTPSConnection
+
+    class PinnedAdapter(requests.adapters.HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": PinnedHTTPConnectionPool, "https": PinnedHTTPSConnectionPool}
+
+    session = requests.Session()
+    session.headers.update(FAKE_BROWSER_HEADERS)
+    adapter = PinnedAdapter(pool_connections=32, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+HTTP = Lazy("http session", make_http_session)
+
+class FetchRejected(Exception):
+    """A response was refused before its body finished downloading (too large, wrong type)."""
+
+# --- SCRAPING ENGINE ---
+class HostLimiter:
+    """Caps how many requests run against the same hostname at once."""
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._slots = {} # hostname -> [semaphore, active users]
+
+    @contextmanager
+    def slot(self, hostname):
+        with self._lock:
+            entry = self._slots.setdefault(hostname, [threading.BoundedSemaphore(self.limit), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0: del self._slots[hostname]
+
+class HostQueue:
+    """Runs tasks on a pool, at most `limit` per hostname at once.
+
+    Tasks over the limit wait in a per-host queue rather than in a pool thread,
+    so a paste grouped by site can't tie up the pool behind one busy host.
+    """
+    def __init__(self, pool, limit):
+        self.pool, self.limit = pool, limit
+        self._lock = threading.Lock()
+        self._hosts = {} # hostname -> [running, deque of waiting (future, fn, args)]
+
+    def submit(self, hostname, fn, *args):
+        future = Future()
+        with self._lock:
+            entry = self._hosts.setdefault(hostname, [0, deque()])
+            if entry[0] >= self.limit:
+                entry[1].append((future, fn, args))
+                return future
+            entry[0] += 1
+        self._start(hostname, future, fn, args)
+        return future
+
+    def _start(self, hostname, future, fn, args):
+        def run():
+            try:
+                if future.set_running_or_notify_cancel():
+                    try: future.set_result(fn(*args))
+                    except BaseException as e: future.set_exception(e)
+            finally: self._next(hostname)
+        self.pool.submit(run)
+
+    def _next(self, hostname):
+        with self._lock:
+            entry = self._hosts[hostname]
+            if not entry[1]:
+                entry[0] -= 1
+                if entry[0] == 0: del self._hosts[hostname]
+                return
+            task = entry[1].popleft()
+        self._start(hostname, *task)
+
+SCRAPE_POOL = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="scrape")
+HOST_QUEUE = HostQueue(SCRAPE_POOL, SCRAPE_PER_HOST)
+
+# --- SHARED STATE ---
+def open_db(path, schema="", timeout=SQLITE_TIMEOUT):
+    """Opens a SQLite file shared by every ingester worker, creating its folder and running `schema`.
+
+    Every store opens its file here, so they all use WAL and wait on each other's
+    locks instead of failing. `schema` runs on every open, so it must be idempotent.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if schema: conn.executescript(schema)
+    return conn
+
+# --- BACKGROUND JOBS ---
+class BatchStore:
+    """Registry of bulk batches and the progress of their background jobs.
+
+    A batch moves through stages: "staging" (scraping URLs), "review" (waiting on the
+    user), "committing" (saving recipes) and "done", or "failed" (with a message) if
+    a job dies. Batches expire after `timeout`
+    seconds and the oldest are evicted once `max_batches` is reached. They live in
+    DATA_DIR/state.db, so any worker can serve a batch whichever one runs its job.
+    """
+    FIELDS = ("items", "total", "done", "failed", "message")
+
+    def __init__(self, timeout, max_batches):
+        self.timeout = timeout
+        self.max_batches = max_batches
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = open_db(os.path.join(DATA_DIR, "state.db"), """
+                CREATE TABLE IF NOT EXISTS batches (
+                    id TEXT PRIMARY KEY, timestamp REAL, stage TEXT,
+                    total INTEGER, done INTEGER, failed INTEGER, items TEXT, message TEXT
+                );
+            """)
+            # state.db from before failed batches had a message
+            try: self._conn.execute("ALTER TABLE batches ADD COLUMN message TEXT")
+            except sqlite3.OperationalError: pass # Already there
+        return self._conn
+
+    def create(self, total):
+        batch_id = str(uuid.uuid4())
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM batches WHERE timestamp < ?", (time.time() - self.timeout,))
+                db.execute("DELETE FROM batches WHERE id NOT IN (SELECT id FROM batches ORDER BY timestamp DESC LIMIT ?)", (self.max_batches - 1,))
+                db.execute("INSERT INTO batches VALUES (?, ?, 'staging', ?, 0, 0, '[]', NULL)", (batch_id, time.time(), total))
+        return batch_id
+
+    def get(self, batch_id):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT stage, total, done, failed, items FROM batches WHERE id = ? AND timestamp >= ?",
+                (batch_id, time.time() - self.timeout)
+            ).fetchone()
+        if not row: return None
+        return {"stage": row[0], "total": row[1], "done": row[2], "failed": row[3], "items": json.loads(row[4])}
+
+    def progress(self, batch_id, ok):
+        """Counts one finished item of the running job."""
+        column = "done" if ok else "failed"
+        with self._lock:
+            db = self._db()
+            with db: db.execute(f"UPDATE batches SET {column} = {column} + 1 WHERE id = ?", (batch_id,))
+
+    def advance(self, batch_id, stage, expected=None, **fields):
+        """Moves a batch to a new stage. Returns False if it's gone or not in `expected` stage."""
+        assignments, params = ["stage = ?", "timestamp = ?"], [stage, time.time()]
+        for name in self.FIELDS:
+            if name in fields:
+                assignments.append(f"{name} = ?")
+                params.append(json.dumps(fields[name]) if name == "items" else fields[name])
+        sql = f"UPDATE batches SET {', '.join(assignments)} WHERE id = ? AND timestamp >= ?"
+        params += [batch_id, time.time() - self.timeout]
+        if expected:
+            sql += " AND stage = ?"
+            params.append(expected)
+        with self._lock:
+            db = self._db()
+            with db: return db.execute(sql, params).rowcount > 0
+
+    def discard(self, batch_id):
+        with self._lock:
+            db = self._db()
+            with db: db.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+    def status(self, batch_id):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT stage, total, done, failed, message FROM batches WHERE id = ? AND timestamp >= ?",
+                (batch_id, time.time() - self.timeout)
+            ).fetchone()
+        if not row: return None
+        return {"stage": row[0], "total": row[1], "done": row[2], "failed": row[3], "pending": row[1] - row[2] - row[3], "message": row[4]}
+
+BATCHES = BatchStore(BATCH_TIMEOUT, MAX_BATCHES)
+
+class CoverLog:
+    """Rendition settings each bundle's cover set was last rendered with (DATA_DIR/state.db).
+
+    Every cover save records its fingerprint along with cover.jpg's mtime and
+    size, so `main.py reencode` can skip bundles that are already current
+    (or that it finished before being interrupted) and notice replaced covers.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = open_db(os.path.join(DATA_DIR, "state.db"), "CREATE TABLE IF NOT EXISTS covers (slug TEXT PRIMARY KEY, fingerprint TEXT, mtime_ns INTEGER, size INTEGER)")
+        return self._conn
+
+    def record(self, slug, fingerprint):
+        try:
+            stat = os.stat(os.path.join(CONTENT_DIR, slug, "cover.jpg"))
+            with self._lock:
+                db = self._db()
+                with db: db.execute("INSERT OR REPLACE INTO covers VALUES (?, ?, ?, ?)", (slug, fingerprint, stat.st_mtime_ns, stat.st_size))
+        except (OSError, sqlite3.Error) as e: print(f"Warning: Could not record cover settings: {e}", flush=True)
+
+    def is_current(self, slug, fingerprint):
+        try:
+            stat = os.stat(os.path.join(CONTENT_DIR, slug, "cover.jpg"))
+            with self._lock:
+                row = self._db().execute("SELECT fingerprint, mtime_ns, size FROM covers WHERE slug = ?", (slug,)).fetchone()
+        except (OSError, sqlite3.Error): return False
+        return row == (fingerprint, stat.st_mtime_ns, stat.st_size)
+
+COVER_LOG = CoverLog()
+JOB_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="job")
+
+# --- RECIPE INDEX ---
+class RecipeIndex:
+    """Persistent SQLite index of recipe frontmatter, keyed by slug.
+
+    Each row remembers the mtime and size of the index.md it was parsed from, so
+    `sync()` only re-parses bundles that changed since the last run. Save and
+    delete keep it current through `update()` and `remove()`. Titles, tags,
+    ingredients and instructions also feed an FTS5 table used by /search.
+    Normalized source URLs are mirrored in memory so staging can spot a recipe
+    that was already imported without fetching it.
+    """
+    SCHEMA_VERSION = 2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self._sources = None # normalized source_url -> slug
+        self._slug_sources = {} # slug -> normalized source_url
+        self._sources_version = None
+
+    def _source_map(self, db):
+        version = db.execute("PRAGMA data_version").fetchone()[0]
+        if self._sources is None or version != self._sources_version:
+            self._sources, self._slug_sources, self._sources_version = {}, {}, version
+            for slug, url in db.execute("SELECT slug, source_url FROM recipes WHERE source_url != ''"):
+                self._add_source(slug, url)
+        return self._sources
+
+    def _add_source(self, slug, url):
+        key = source_key(url)
+        if not key: return
+        self._sources[key] = slug
+        self._slug_sources[slug] = key
+
+    def _drop_source(self, slug):
+        key = self._slug_sources.pop(slug, None)
+        if key and self._sources.get(key) == slug: del self._sources[key]
+
+    def _db(self):
+        if self._conn is None:
+            # A worker may hold the write lock for a whole startup sync
+            try: self._conn = open_db(os.path.join(DATA_DIR, "index.db"), timeout=600)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: Recipe index is not persistent ({e})", flush=True)
+                self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+            # Layout changes just drop the tables; the next sync rebuilds them from disk
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                self._conn.executescript(f"""
+                    DROP TABLE IF EXISTS recipes;
+                    DROP TABLE IF EXISTS recipe_tags;
+                    DROP TABLE IF EXISTS recipe_search;
+                    CREATE TABLE recipes (
+                        slug TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER,
+                        title TEXT, image TEXT, source_url TEXT
+                    );
+                    CREATE TABLE recipe_tags (slug TEXT, tag TEXT);
+                    CREATE INDEX recipe_tags_slug ON recipe_tags (slug);
+                    CREATE INDEX recipe_tags_tag ON recipe_tags (tag);
+                    CREATE VIRTUAL TABLE recipe_search USING fts5(
+                        slug UNINDEXED, title, tags, ingredients, instructions,
+                        tokenize = 'porter unicode61'
+                    );
+                    PRAGMA user_version = {self.SCHEMA_VERSION};
+                """)
+        return self._conn
+
+    def _delete(self, db, slug):
+        # Tag counts follow the index row for row, under the same lock, so workers reloading them can't double count
+        old_tags = [t for (t,) in db.execute("SELECT tag FROM recipe_tags WHERE slug = ?", (slug,))]
+        if old_tags: TAG_INDEX.apply(old_tags, ())
+        for table in ("recipes", "recipe_tags", "recipe_search"):
+            db.execute(f"DELETE FROM {table} WHERE slug = ?", (slug,))
+        if self._sources is not None: self._drop_source(slug)
+
+    def _write(self, db, slug, stat, fm, body):
+        self._delete(db, slug)
+        if self._sources is not None: self._add_source(slug, fm.get('source_url'))
+        db.execute(
+            "INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?, ?)",
+            (slug, stat.st_mtime_ns, stat.st_size, str(fm.get('title') or ''), str(fm.get('image') or ''), fm.get('source_url') or '')
+        )
+        tags = fm.get('tags') or []
+        if isinstance(tags, str): tags = [tags]
+        tags = dict.fromkeys(str(t).strip().lower() for t in tags if t)
+        db.executemany("INSERT INTO recipe_tags VALUES (?, ?)", [(slug, t) for t in tags if t])
+        TAG_INDEX.apply((), [t for t in tags if t])
+        ingredients, instructions = parse_recipe_sections(body)
+        db.execute(
+            "INSERT INTO recipe_search VALUES (?, ?, ?, ?, ?)",
+            (slug, str(fm.get('title') or ''), " ".join(tags), html.unescape("\n".join(ingredients)), html.unescape(instructions))
+        )
+
+    def sync(self):
+        """Reconciles the index with CONTENT_DIR. Returns (recipes, reparsed, removed)."""
+        with self._lock:
+            db = self._db()
+            with db:
+                # Take the write lock up front: workers starting together queue here and the later ones find nothing to parse
+                db.execute("BEGIN IMMEDIATE")
+                known = {slug: (m, sz) for slug, m, sz in db.execute("SELECT slug, mtime_ns, size FROM recipes")}
+                seen, reparsed = set(), 0
+                try: entries = list(os.scandir(CONTENT_DIR))
+                except FileNotFoundError: entries = []
+                for entry in entries:
+                    try: stat = os.stat(os.path.join(entry.path, "index.md"))
+                    except OSError: continue
+                    seen.add(entry.name)
+                    if known.get(entry.name) == (stat.st_mtime_ns, stat.st_size): continue
+                    try: fm, body = read_recipe_file(os.path.join(entry.path, "index.md"))
+                    except Exception as e:
+                        print(f"Warning: Skipping unreadable recipe {entry.name}: {e}", flush=True)
+                        continue
+                    self._write(db, entry.name, stat, fm, body)
+                    reparsed += 1
+                removed = [slug for slug in known if slug not in seen]
+                for slug in removed: self._delete(db, slug)
+            return len(seen), reparsed, len(removed)
+
+    def update(self, slug):
+        """Re-indexes a single bundle after it was written."""
+        path = os.path.join(CONTENT_DIR, slug, "index.md")
+        try:
+            stat = os.stat(path)
+            fm, body = read_recipe_file(path)
+        except (OSError, ValueError, yaml.YAMLError):
+            return self.remove(slug)
+        with self._lock:
+            db = self._db()
+            with db: self._write(db, slug, stat, fm, body)
+
+    def remove(self, slug):
+        with self._lock:
+            db = self._db()
+            with db: self._delete(db, slug)
+
+    def find_source(self, url):
+        """Returns {"slug", "title"} of the recipe imported from this URL, or None."""
+        key = source_key(url)
+        if not key: return None
+        with self._lock:
+            db = self._db()
+            slug = self._source_map(db).get(key)
+            row = db.execute("SELECT title FROM recipes WHERE slug = ?", (slug,)).fetchone() if slug else None
+        # Bundles removed behind our back stay mapped until the next sync
+        if not row or not os.path.exists(os.path.join(CONTENT_DIR, slug, "index.md")): return None
+        return {"slug": slug, "title": row[0] or slug}
+
+    def tag_counts(self):
+        with self._lock:
+            return Counter(dict(self._db().execute("SELECT tag, COUNT(*) FROM recipe_tags GROUP BY tag")))
+
+    def load_tags(self, force=False):
+        """Reloads TAG_INDEX from the index when another process (ingester worker) changed it."""
+        with self._lock:
+            db = self._db()
+            version = db.execute("PRAGMA data_version").fetchone()[0]
+            if force or version != TAG_INDEX.version:
+                TAG_INDEX.reset(dict(db.execute("SELECT tag, COUNT(*) FROM recipe_tags GROUP BY tag")), version)
+
+    def search(self, query, tags=(), limit=20, exclude="", exclude_tags=()):
+        """Full-text search. `query` and `exclude` are FTS5 expressions (see parse_search_query)."""
+        sql = "SELECT r.slug, r.title, r.image FROM recipes r"
+        params = []
+        if query:
+            sql += " JOIN recipe_search s ON s.slug = r.slug WHERE recipe_search MATCH ?"
+            params.append(query)
+        else:
+            sql += " WHERE 1"
+        for tag in tags:
+            sql += " AND r.slug IN (SELECT slug FROM recipe_tags WHERE tag = ?)"
+            params.append(tag)
+        if exclude:
+            sql += " AND r.slug NOT IN (SELECT slug FROM recipe_search WHERE recipe_search MATCH ?)"
+            params.append(exclude)
+        for tag in exclude_tags:
+            sql += " AND r.slug NOT IN (SELECT slug FROM recipe_tags WHERE tag = ?)"
+            params.append(tag)
+        # Title hits outrank tag hits, which outrank ingredient and instruction hits
+        sql += " ORDER BY " + ("bm25(recipe_search, 0, 10.0, 5.0, 2.0, 1.0)" if query else "r.title") + " LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            try: rows = self._db().execute(sql, params).fetchall()
+            except sqlite3.OperationalError: return [] # Malformed FTS expression
+        return [{"slug": slug, "title": title, "image": image} for slug, title, image in rows]
+
+RECIPE_INDEX = RecipeIndex()
+
+# --- RECIPE CACHE ---
+class RecipeCache:
+    """LRU of parsed recipe bundles, validated against the index.md mtime and size.
+
+    Edits re-read the same few recipes over and over (/edit, then /save, maybe
+    /delete), so each file is parsed once per change instead of once per request.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # slug -> ((mtime_ns, size), data)
+
+    def get(self, slug):
+        """Returns a copy of the parsed recipe, or None if it is missing or unreadable."""
+        path = os.path.join(CONTENT_DIR, slug, "index.md")
+        try: stat = os.stat(path)
+        except OSError:
+            self.discard(slug)
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(slug)
+                return copy_recipe(entry[1])
+        
+        try: data = parse_recipe_bundle(slug, path)
+        except Exception: return None
+        with self._lock:
+            self._entries[slug] = (version, data)
+            self._entries.move_to_end(slug)
+            while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+        return copy_recipe(data)
+
+    def discard(self, slug):
+        with self._lock: self._entries.pop(slug, None)
+
+RECIPE_CACHE = RecipeCache(RECIPE_CACHE_SIZE)
+
+# --- TAG INDEX ---
+class TagIndex:
+    """Tag usage counts with a sorted prefix index for autocomplete.
+
+    Every word start of a tag ("main course" -> "main course", "course") is kept
+    in a sorted list, so a prefix lookup is a bisect plus a scan of the matching
+    slice. Saves adjust counts and insert/remove keys in place; the popularity
+    ranking used for empty queries is only re-sorted after a change.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._keys = [] # sorted (word start, tag)
+        self._ranked = None
+        self.version = None # Index data_version the counts were loaded at
+
+    @staticmethod
+    def _normalize(tag):
+        return str(tag).strip().lower()
+
+    @staticmethod
+    def _entries(tag):
+        words = tag.split()
+        return [(" ".join(words[i:]), tag) for i in range(len(words))] or [(tag, tag)]
+
+    def reset(self, counts, version=None):
+        """Replaces the index with a {tag: count} mapping."""
+        with self._lock:
+            self.version = version
+            self._counts = {}
+            for tag, count in counts.items():
+                tag = self._normalize(tag)
+                if tag and count > 0: self._counts[tag] = self._counts.get(tag, 0) + count
+            self._keys = sorted(e for tag in self._counts for e in self._entries(tag))
+            self._ranked = None
+
+    def apply(self, old_tags=(), new_tags=()):
+        """Moves one recipe's tags from old_tags to new_tags."""
+        with self._lock:
+            for tag, delta in [(t, -1) for t in old_tags or ()] + [(t, 1) for t in new_tags or ()]:
+                tag = self._normalize(tag)
+                if not tag: continue
+                before = self._counts.get(tag, 0)
+                after = before + delta
+                if after > 0: self._counts[tag] = after
+                else: self._counts.pop(tag, None)
+                if before <= 0 < after:
+                    for entry in self._entries(tag): bisect.insort(self._keys, entry)
+                elif after <= 0 < before:
+                    for entry in self._entries(tag):
+                        i = bisect.bisect_left(self._keys, entry)
+                        if i < len(self._keys) and self._keys[i] == entry: del self._keys[i]
+                self._ranked = None
+
+    def counts(self):
+        with self._lock: return dict(self._counts)
+
+    def exists(self, tags):
+        """True if every tag is already in use."""
+        with self._lock: return all(self._normalize(t) in self._counts for t in tags)
+
+    def suggest(self, prefix="", limit=TAG_SUGGESTIONS):
+        """Returns up to `limit` [tag, count] pairs whose words start with `prefix`, most used first."""
+        prefix = self._normalize(prefix)
+        with self._lock:
+            if not prefix:
+                if self._ranked is None:
+                    self._ranked = sorted(self._counts.items(), key=lambda x: (-x[1], x[0]))
+                return [list(item) for item in self._ranked[:limit]]
+            start = bisect.bisect_left(self._keys, (prefix,))
+            end = bisect.bisect_left(self._keys, (prefix + "\U0010ffff",), start)
+            matches = {tag: self._counts[tag] for _, tag in self._keys[start:end]}
+        best = heapq.nsmallest(limit, matches.items(), key=lambda x: (-x[1], x[0]))
+        return [list(item) for item in best]
+
+TAG_INDEX = TagIndex()
+
+# --- IMAGE POOL ---
+_IMAGE_POOL = None
+_IMAGE_POOL_LOCK = threading.Lock()
+
+def image_pool():
+    """Lazily starts the process pool that resizes and encodes covers on every core."""
+    global _IMAGE_POOL
+    with _IMAGE_POOL_LOCK:
+        if _IMAGE_POOL is None:
+            # Spawn rather than fork: forking a threaded server can deadlock the child
+            _IMAGE_POOL = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _IMAGE_POOL
+
+def reset_image_pool():
+    global _IMAGE_POOL
+    with _IMAGE_POOL_LOCK:
+        if _IMAGE_POOL: _IMAGE_POOL.shutdown(wait=False, cancel_futures=True)
+        _IMAGE_POOL = None
+
+# --- IMAGE CACHE ---
+class ImageCache:
+    """Content-addressed store of downloaded originals and rendered cover sets.
+
+    Originals live under objects/ keyed by SHA-256; cover sets live under
+    renditions/<hash>-<settings fingerprint>/ and are hardlinked into bundles.
+    A SQLite table maps image URLs to hashes and tracks size and last use, so the
+    least recently used entries are evicted once the store exceeds `max_bytes`.
+    Files are only ever replaced, never rewritten, so sharing links is safe.
+    """
+    def __init__(self, max_bytes, url_ttl):
+        self.max_bytes = max_bytes
+        self.url_ttl = url_ttl
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _root(self):
+        return os.path.join(DATA_DIR, "images")
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = open_db(os.path.join(self._root(), "cache.db"), """
+                CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT, fetched_at REAL);
+                CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, size INTEGER, last_used REAL);
+                CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+            """)
+        return self._conn
+
+    def _path(self, key):
+        if "-" in key: return os.path.join(self._root(), "renditions", key)
+        return os.path.join(self._root(), "objects", key[:2], key)
+
+    def _hit(self, db, key):
+        """Marks an entry as used. Drops the row and returns False if its files vanished."""
+        if os.path.exists(self._path(key)):
+            with db: db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            return True
+        with db: db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        return False
+
+    def _add(self, db, key, size):
+        with db: db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, size, time.time()))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes: return
+        for old_key, old_size in db.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes: break
+            if old_key == key: continue
+            if "-" in old_key: shutil.rmtree(self._path(old_key), ignore_errors=True)
+            else: remove_quietly(self._path(old_key))
+            with db:
+                db.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                db.execute("DELETE FROM urls WHERE hash = ?", (old_key,))
+            total -= old_size
+
+    def lookup_url(self, url):
+        """Returns the cached original for an image URL, or None."""
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute("SELECT hash FROM urls WHERE url = ? AND fetched_at > ?", (url, time.time() - self.url_ttl)).fetchone()
+                if not row or not self._hit(db, row[0]): return None
+            with open(self._path(row[0]), "rb") as f: return f.read()
+        except (OSError, sqlite3.Error): return None
+
+    def store_original(self, data, url=None):
+        """Stores image bytes (optionally under their URL). Returns the content hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            with self._lock:
+                db = self._db()
+                if not self._hit(db, digest):
+                    path = self._path(digest)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    write_atomic(path, data)
+                    self._add(db, digest, len(data))
+                if url:
+                    with db: db.execute("INSERT OR REPLACE INTO urls VALUES (?, ?, ?)", (url, digest, time.time()))
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Image cache unavailable: {e}", flush=True)
+        return digest
+
+    def renditions(self, digest, fingerprint):
+        """Returns the folder holding a rendered cover set, or None."""
+        key = f"{digest}-{fingerprint}"
+        try:
+            with self._lock:
+                return self._path(key) if self._hit(self._db(), key) else None
+        except (OSError, sqlite3.Error): return None
+
+    def store_renditions(self, digest, fingerprint, files):
+        """Saves a rendered cover set ({filename: bytes}). Returns its folder, or None."""
+        key = f"{digest}-{fingerprint}"
+        try:
+            with self._lock:
+                db = self._db()
+                path = self._path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Unique temp folder: other workers (or `main.py reencode`) may store the same set
+                tmp_path = tempfile.mkdtemp(prefix=f".{key}.", dir=os.path.dirname(path))
+                try:
+                    for name, content in files.items():
+                        with open(os.path.join(tmp_path, name), "wb") as f: f.write(content)
+                    try: os.rename(tmp_path, path)
+                    except OSError:
+                        # Lost the race to another process; the set it stored is the same
+                        if not os.path.isdir(path): raise
+                finally: shutil.rmtree(tmp_path, ignore_errors=True)
+                self._add(db, key, sum(len(c) for c in files.values()))
+                return path
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Image cache unavailable: {e}", flush=True)
+            return None
+
+IMAGE_CACHE = ImageCache(IMAGE_CACHE_MAX_BYTES, IMAGE_URL_TTL)
+
+class PageCache:
+    """Fetched recipe pages and their parsed output, keyed by normalized URL.
+
+    HTML is stored compressed along with ETag/Last-Modified so stale entries can be
+    revalidated with a conditional GET. Parsed output is tagged with the
+    recipe_scrapers version and re-derived from the stored HTML (no network) after
+    an upgrade. Least recently used pages are evicted past `max_bytes`.
+    """
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = open_db(os.path.join(DATA_DIR, "pages.db"), """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY, html BLOB, etag TEXT, last_modified TEXT,
+                    fetched_at REAL, last_used REAL, size INTEGER, parser TEXT, data TEXT
+                );
+                CREATE INDEX IF NOT EXISTS pages_lru ON pages (last_used);
+            """)
+        return self._conn
+
+    def get(self, url):
+        """Returns the cached entry as a dict (with "fresh" set), or None."""
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute("SELECT html, etag, last_modified, fetched_at, parser, data FROM pages WHERE url = ?", (url,)).fetchone()
+                if not row: return None
+                with db: db.execute("UPDATE pages SET last_used = ? WHERE url = ?", (time.time(), url))
+            return {
+                "html": zlib.decompress(row[0]).decode('utf-8'), "etag": row[1], "last_modified": row[2],
+                "fresh": row[3] > time.time() - self.ttl,
+                "data": json.loads(row[5]) if row[5] and row[4] == scraper_version() else None,
+            }
+        except (OSError, sqlite3.Error, zlib.error, ValueError): return None
+
+    def put(self, url, html, etag=None, last_modified=None, data=None):
+        """Stores a freshly fetched (or revalidated) page and its parsed output."""
+        blob = zlib.compress(html.encode('utf-8'), 6)
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                with db: db.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, blob, etag, last_modified, now, now, len(blob), scraper_version(), json.dumps(data) if data else None)
+                )
+                total = db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+                if total <= self.max_bytes: return
+                for old_url, old_size in db.execute("SELECT url, size FROM pages ORDER BY last_used").fetchall():
+                    if total <= self.max_bytes: break
+                    if old_url == url: continue
+                    with db: db.execute("DELETE FROM pages WHERE url = ?", (old_url,))
+                    total -= old_size
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Page cache unavailable: {e}", flush=True)
+
+PAGE_CACHE = PageCache(PAGE_CACHE_MAX_BYTES, PAGE_CACHE_TTL)
 
 # --- DATA MODELS ---
 class BulkCommitItem(BaseModel):
@@ -71,82 +1213,149 @@ def generate_slug(title):
     if not title: return ""
     return re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
 
+def url_hostname(url):
+    """Returns the hostname of an http(s) URL, or None."""
+    if not url or not url.strip(): return None
+    try: parsed = urlparse(url.strip())
+    except ValueError: return None
+    if parsed.scheme not in ['http', 'https']: return None
+    return parsed.hostname
+
 def is_safe_url(url):
-    """Validates that a URL belongs to a public, non-local domain."""
-    if not url or not url.strip(): return False
-    try:
-        parsed = urlparse(url)
-        if parsed.scheme not in ['http', 'https']: return False
-        hostname = parsed.hostname
-        if not hostname: return False
-        # block loopback/local
-        if hostname in ['localhost', '127.0.0.1', '::1', '0.0.0.0']: return False
-        try:
-            ip = socket.gethostbyname(hostname)
-        except:
-            return False 
-        # block private ranges
-        ip_parts = [int(x) for x in ip.split('.')]
-        if ip_parts[0] == 10: return False
-        if ip_parts[0] == 192 and ip_parts[1] == 168: return False
-        if ip_parts[0] == 172 and 16 <= ip_parts[1] <= 31: return False
-        if ip_parts[0] == 127: return False
-        return True
-    except:
-        return False
+    """Validates that a URL belongs to a public, non-local domain (cached DNS)."""
+    hostname = url_hostname(url)
+    return bool(hostname and RESOLVER.resolve(hostname))
 
-def trigger_hugo_rebuild():
-    """Touches config.toml to force Hugo (running in watch mode) to rebuild."""
-    try:
-        config_path = "/app/site/config.toml"
-        if os.path.exists(config_path):
-            Path(config_path).touch()
-    except Exception as e:
-        print(f"Warning: Failed to trigger Hugo rebuild: {e}")
+async def is_safe_url_async(url):
+    """is_safe_url for async handlers: resolves without blocking the event loop."""
+    hostname = url_hostname(url)
+    return bool(hostname and await RESOLVER.resolve_async(hostname))
 
-def rebuild_taxonomy_cache():
-    """Scans all recipe markdown files to rebuild the tag cloud."""
-    global TAXONOMY_CACHE
-    print("Rebuilding Tag Cache...", flush=True)
-    tag_counter = Counter()
+def curl_pin_args(url):
+    """Curl --resolve arguments pinning the URL's host to its validated addresses, tried in turn (None if unsafe)."""
+    hostname = url_hostname(url)
+    addresses = RESOLVER.resolve(hostname) if hostname else None
+    if not addresses: return None
+    try: port = urlparse(url.strip()).port or (443 if url.strip().lower().startswith('https') else 80)
+    except ValueError: return None
+    return ["--resolve", f"{hostname}:{port}:" + ",".join(f"[{a}]" if ':' in a else a for a in addresses)]
+
+def unpublish_recipe(slug):
+    """Removes a recipe's rendered pages, which Hugo's incremental rebuilds leave behind."""
+    shutil.rmtree(os.path.join(PUBLIC_DIR, "recipes", slug), ignore_errors=True)
+
+def publish_targets(saved=(), removed=False, since_ns=None):
+    """Lists the (output file, minimum mtime) pairs that prove Hugo rendered a change.
+
+    Writing a bundle is all Hugo needs to re-render just that page (plus the lists
+    that show it), so there is no full rebuild to trigger. The build-complete
+    signal is the output itself: each saved page's index.html must be newer than
+    its markdown, and after removals the home page must be newer than `since_ns`.
+    """
+    targets = []
+    for slug in saved:
+        try: changed_ns = os.stat(os.path.join(CONTENT_DIR, slug, "index.md")).st_mtime_ns
+        except OSError: continue
+        targets.append((os.path.join(PUBLIC_DIR, "recipes", slug, "index.html"), changed_ns))
+    if removed: targets.append((os.path.join(PUBLIC_DIR, "index.html"), since_ns or time.time_ns()))
+    return targets
+
+def wait_for_publish(saved=(), removed=False, since_ns=None):
+    """Blocks until Hugo's watcher has rendered the change (or PUBLISH_TIMEOUT passes)."""
+    targets = publish_targets(saved, removed, since_ns)
+    deadline = time.time() + PUBLISH_TIMEOUT
+    with METRICS.timer("publish_wait"):
+        while targets and time.time() < deadline:
+            targets = [(path, ns) for path, ns in targets if not is_newer(path, ns)]
+            if targets: time.sleep(0.1)
+    if targets: METRICS.inc("localtoast_publish_timeouts_total")
+    return not targets
+
+def is_newer(path, since_ns):
+    try: return os.stat(path).st_mtime_ns >= since_ns
+    except OSError: return False
+
+def read_recipe_file(path):
+    """Returns (frontmatter, body) for a markdown file with a leading '---' YAML block."""
+    with open(path, 'r') as file:
+        if file.readline().rstrip('\n') != '---': raise ValueError("Missing frontmatter")
+        lines = []
+        for line in file:
+            if line.rstrip('\n') == '---':
+                data = yaml.safe_load("".join(lines)) or {}
+                if not isinstance(data, dict): raise ValueError("Frontmatter is not a mapping")
+                return data, file.read()
+            lines.append(line)
+    raise ValueError("Unterminated frontmatter")
+
+def parse_recipe_sections(body):
+    """Splits a recipe body into (ingredient lines, instructions text)."""
+    ing_match = re.search(r'## Ingredients\n(.*?)\n## Instructions', body, re.DOTALL)
+    ingredients = [line.lstrip('- ').strip() for line in ing_match.group(1).strip().split('\n')] if ing_match else []
     
-    files = glob.glob(os.path.join(CONTENT_DIR, "*", "index.md"))
-    for f in files:
-        try:
-            with open(f, 'r') as file:
-                # Read only head to avoid loading full content
-                head = [next(file) for _ in range(20)]
-                content = "".join(head)
-                match = re.search(r'^---\n(.*?)\n---', content, re.DOTALL)
-                if match:
-                    data = yaml.safe_load(match.group(1))
-                    if 'tags' in data:
-                        for t in data['tags']: 
-                            if t: tag_counter[str(t).strip().lower()] += 1
-        except: pass
+    inst_match = re.search(r'## Instructions\n(.*)', body, re.DOTALL)
+    instructions = inst_match.group(1).strip() if inst_match else ""
+    return ingredients, instructions
+
+SEARCH_OPERATORS = ("AND", "OR", "NOT")
+SEARCH_COLUMNS = {"title": "title", "ingredient": "ingredients", "ingredients": "ingredients", "instructions": "instructions"}
+
+def parse_search_query(text):
+    """Translates a user query into (FTS5 expression, tag filters, excluded FTS5 expression, excluded tags).
+
+    Supports AND/OR/NOT, "quoted phrases", a trailing * for prefixes, column
+    filters (title:, ingredients:, instructions:) and exact tag:name filters.
+    A NOT with nothing to subtract from ("NOT chicken", "a OR NOT b") excludes
+    the next term from all results. The last bare word is always prefix-matched
+    so results update while typing.
+    """
+    parts, tags, excluded, excluded_tags = [], [], [], []
+    negate, last_bare = False, None
+    for token in re.findall(r'(?:\w+:)?(?:"[^"]*"?|[^\s"]+)', text or ""):
+        if token in SEARCH_OPERATORS:
+            if token == "NOT" and (negate or not parts or parts[-1] in SEARCH_OPERATORS):
+                while parts and parts[-1] in SEARCH_OPERATORS: parts.pop()
+                negate = True
+            elif parts and parts[-1] not in SEARCH_OPERATORS and not negate: parts.append(token)
+            continue
+        field, value = None, token
+        match = re.match(r'(\w+):(.+)$', token)
+        if match and (match.group(1).lower() in SEARCH_COLUMNS or match.group(1).lower() in ("tag", "tags")):
+            field, value = match.group(1).lower(), match.group(2)
         
-    TAXONOMY_CACHE["tags"] = tag_counter
-
-def update_taxonomy_counters(old_tags=None, new_tags=None):
-    """Incrementally updates the in-memory tag cache."""
-    global TAXONOMY_CACHE
-    if old_tags:
-        TAXONOMY_CACHE["tags"].subtract(old_tags)
-    if new_tags:
-        TAXONOMY_CACHE["tags"].update(new_tags)
-    # Remove zero/negative counts
-    TAXONOMY_CACHE["tags"] = +TAXONOMY_CACHE["tags"]
-
-def get_cached_tags():
-    """Returns tags sorted by popularity."""
-    tag_items = [[k, v] for k, v in TAXONOMY_CACHE["tags"].items()]
-    return sorted(tag_items, key=lambda x: (-x[1], x[0]))
-
-def cleanup_expired_batches():
-    now = time.time()
-    expired_ids = [bid for bid, data in PENDING_BATCHES.items() if now - data['timestamp'] > BATCH_TIMEOUT]
-    for bid in expired_ids:
-        del PENDING_BATCHES[bid]
+        if field in ("tag", "tags"):
+            tag = value.strip('"*').strip().lower()
+            if not tag: continue
+            if parts and parts[-1] == "NOT": # FTS5 can't negate a tag filter
+                parts.pop()
+                negate = True
+            (excluded_tags if negate else tags).append(tag)
+            negate = False
+            continue
+
+        is_phrase, is_prefix = value.startswith('"'), value.rstrip('"').endswith('*')
+        words = re.findall(r'\w+', value.lower())
+        if not words: continue
+        term = '"' + " ".join(words) + '"' + ('*' if is_prefix else '')
+        if field: term = f"{SEARCH_COLUMNS[field]} : {term}"
+        target = excluded if negate else parts
+        target.append(term)
+        negate = False
+        last_bare = None if (is_phrase or is_prefix) else (target, len(target) - 1)
+    
+    while parts and parts[-1] in SEARCH_OPERATORS: parts.pop()
+    if last_bare:
+        target, i = last_bare
+        if i == len(target) - 1: target[i] += '*'
+    return " ".join(parts), tags, " OR ".join(excluded), excluded_tags
+
+def rebuild_taxonomy_cache():
+    """Syncs the recipe index with disk and rebuilds the tag cloud from it."""
+    print("Rebuilding Tag Cache...", flush=True)
+    start = time.time()
+    total, reparsed, removed = RECIPE_INDEX.sync()
+    RECIPE_INDEX.load_tags(force=True)
+    print(f"Indexed {total} recipes in {time.time() - start:.2f}s ({reparsed} parsed, {removed} removed)", flush=True)
 
 def clean_ingredient(text):
     """Standardizes ingredient units and formatting."""
@@ -157,58 +1366,565 @@ def clean_ingredient(text):
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
+def fetch_capped(url, max_bytes, timeout=10, deadline=None, headers=None, sniff=None):
+    """Streams a GET through the shared session without ever holding more than max_bytes.
+
+    Rejects up front on Content-Length, lets `sniff` veto the body from its first
+    bytes, and stops reading once the cap or the deadline (epoch seconds) is passed.
+    HTTP errors raise requests.HTTPError. Returns (response, body bytes).
+    """
+    if deadline is not None:
+        timeout = deadline - time.time()
+        if timeout <= 0: raise TimeoutError("Deadline passed before the request started")
+    
+    with HTTP.get(url, headers=headers, timeout=(min(5, timeout), timeout), stream=True) as response:
+        response.raise_for_status()
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) > max_bytes:
+            raise FetchRejected(f"Response is larger than {max_bytes // 1024} KB")
+        
+        chunks, size, sniffed = [], 0, sniff is None
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > max_bytes: raise FetchRejected(f"Response is larger than {max_bytes // 1024} KB")
+            # Socket timeouts are per-read, so a slow drip could run forever without this
+            if deadline and time.time() > deadline: raise TimeoutError("Deadline passed during download")
+            chunks.append(chunk)
+            if not sniffed and size >= 16:
+                if not sniff(b"".join(chunks)[:16]): raise FetchRejected("Unrecognized content")
+                sniffed = True
+        body = b"".join(chunks)
+        if not sniffed and not sniff(body): raise FetchRejected("Unrecognized content")
+        return response, body
+
+def looks_like_image(prefix):
+    """Magic-byte check against every format Pillow can open."""
+    Image.init()
+    return any(accept and accept(prefix) for _, accept in Image.OPEN.values())
+
+def read_image_header(chunks):
+    """Feeds chunks to Pillow until the image header is parsed.
+
+    Returns {"format", "width", "height"} (plus "body" when the whole file arrived
+    before the header was done), or None if it isn't an image.
+    """
+    parser, read, size = ImageFile.Parser(), [], 0
+    for chunk in chunks:
+        if not read and not looks_like_image(chunk[:16]): return None
+        parser.feed(chunk)
+        read.append(chunk)
+        size += len(chunk)
+        if parser.image:
+            return {"format": parser.image.format, "width": parser.image.width, "height": parser.image.height}
+        if size > IMAGE_PROBE_BYTES: return None
+    
+    # Stream ended: the whole (small) file is here, so keep it
+    try:
+        with Image.open(BytesIO(b"".join(read))) as img:
+            return {"format": img.format, "width": img.width, "height": img.height, "body": b"".join(read)}
+    except Exception: return None
+
+def curl_fetch(url, referer=None, max_bytes=IMAGE_MAX_BYTES, timeout=15):
+    """Fetches a URL with the system Curl (for sites that refuse Requests), yielding the body a chunk at a time.
+
+    The host is pinned to its validated addresses and redirects are refused.
+    Raises FetchRejected for unsafe URLs or bodies over max_bytes, and
+    CalledProcessError if Curl fails. Closing the generator early stops Curl.
+    """
+    pin = curl_pin_args(url)
+    if not pin: raise FetchRejected("Not a public address")
+    # No redirects: --resolve only pins the first host, so a Location could point anywhere
+    cmd = ["curl", "-s", "--fail", "--max-redirs", "0", *pin, "--max-filesize", str(max_bytes), "-A", FAKE_BROWSER_HEADERS["User-Agent"], "--max-time", str(timeout), url]
+    if referer: cmd.extend(["-e", referer])
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        size = 0
+        for chunk in iter(lambda: proc.stdout.read(64 * 1024), b""):
+            size += len(chunk)
+            # --max-filesize can't stop a body sent without a Content-Length
+            if size > max_bytes: raise FetchRejected(f"Response is larger than {max_bytes // 1024} KB")
+            yield chunk
+        if proc.wait() == 63: raise FetchRejected(f"Response is larger than {max_bytes // 1024} KB") # --max-filesize
+        if proc.returncode != 0: raise subprocess.CalledProcessError(proc.returncode, "curl")
+    finally:
+        proc.kill()
+        proc.wait()
+
+def probe_image(image_url, source_url=None):
+    """Reads only as much of a remote image as needed to learn its format and dimensions."""
+    headers = {'Referer': source_url} if source_url else None
+    try:
+        with HTTP.get(image_url, headers=headers, timeout=IMAGE_PROBE_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            return read_image_header(response.iter_content(16 * 1024))
+    except Image.DecompressionBombError: return None
+    except requests.HTTPError as e:
+        if e.response.status_code not in CURL_RETRY_STATUSES: return None
+    except Exception as e:
+        if refused_by_pin(e): return None
+
+    # Same fallback as a real download, but stop reading once the header is in
+    try:
+        with closing(curl_fetch(image_url, source_url, IMAGE_MAX_BYTES, IMAGE_PROBE_TIMEOUT * 2)) as chunks:
+            return read_image_header(chunks)
+    except Exception as e:
+        print(f"Curl failed: {e}")
+        return None
+
 def download_image_with_fallback(image_url, source_url=None):
-    """Attempts download via Requests, falls back to subprocess Curl."""
+    """Downloads raw image bytes via the shared session, using Curl only if the site refuses Requests."""
     if not image_url or not image_url.strip(): return None
     
-    # Method 1: Python Requests
+    cached = IMAGE_CACHE.lookup_url(image_url)
+    METRICS.inc("localtoast_cache_requests_total", cache="image", result="hit" if cached else "miss")
+    if cached: return cached
+    
+    # Method 1: Python Requests (pooled, streamed and size-capped)
     try:
-        session = requests.Session()
-        session.headers.update(FAKE_BROWSER_HEADERS)
-        if source_url: session.headers.update({'Referer': source_url})
-        response = session.get(image_url, timeout=10)
-        if response.status_code == 200:
-            return Image.open(BytesIO(response.content)).convert('RGB')
-    except: pass
+        with METRICS.timer("image_download"):
+            _, content = fetch_capped(image_url, IMAGE_MAX_BYTES, headers={'Referer': source_url} if source_url else None, sniff=looks_like_image)
+        METRICS.inc("localtoast_image_downloads_total", method="requests", result="ok")
+        METRICS.inc("localtoast_fetched_bytes_total", len(content), kind="image")
+        IMAGE_CACHE.store_original(content, url=image_url)
+        return content
+    except FetchRejected as e:
+        METRICS.inc("localtoast_image_downloads_total", method="requests", result="rejected")
+        print(f"Image rejected ({image_url}): {e}")
+        return None # Curl would download the same thing
+    except requests.HTTPError as e:
+        METRICS.inc("localtoast_image_downloads_total", method="requests", result="http_error")
+        if e.response.status_code not in CURL_RETRY_STATUSES: return None
+    except Exception as e: # Connection/TLS trouble: worth a try with Curl
+        if refused_by_pin(e):
+            # A redirect to a private address: Curl must not fetch it either
+            METRICS.inc("localtoast_image_downloads_total", method="requests", result="blocked")
+            return None
+        METRICS.inc("localtoast_image_downloads_total", method="requests", result="error")
     
     # Method 2: System Curl (often handles TSL/Headers better)
     try:
-        cmd = ["curl", "-L", "-A", FAKE_BROWSER_HEADERS["User-Agent"], "--max-time", "15", image_url]
-        if source_url: cmd.extend(["-e", source_url])
-        result = subprocess.run(cmd, capture_output=True)
-        if result.returncode == 0 and len(result.stdout) > 0:
-            return Image.open(BytesIO(result.stdout)).convert('RGB')
+        with METRICS.timer("image_curl"): content = b"".join(curl_fetch(image_url, source_url, IMAGE_MAX_BYTES))
+        if is_image_data(content):
+            METRICS.inc("localtoast_image_downloads_total", method="curl", result="ok")
+            METRICS.inc("localtoast_fetched_bytes_total", len(content), kind="image")
+            IMAGE_CACHE.store_original(content, url=image_url)
+            return content
     except Exception as e: 
         print(f"Curl failed: {e}")
     
+    METRICS.inc("localtoast_image_downloads_total", method="curl", result="failed")
     return None
 
-def scrape_recipe_data(url):
-    """Scrapes data using recipe_scrapers library."""
-    scraper = scrape_me(url)
-    clean_ing = [clean_ingredient(i) for i in scraper.ingredients()]
-    
-    # Combine Host, Cuisine, and Category into Tags
-    raw_tags = [scraper.host()]
+def temp_path(path):
+    """Hidden temp name next to `path`, unique per process and call (several workers may write the same file)."""
+    return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+def write_atomic(path, content):
+    """Writes a file via a temp name + rename, so readers and hardlinks never see a partial file."""
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, "wb") as f: f.write(content)
+        os.replace(tmp_path, path)
+    finally: remove_quietly(tmp_path)
+
+def remove_quietly(path):
+    try: os.remove(path)
+    except OSError: pass
+
+def link_or_copy(src, dst):
+    """Hardlinks src to dst (replacing dst), copying instead across filesystems."""
+    tmp_path = temp_path(dst)
     try:
-        c = scraper.cuisine()
-        if c: raw_tags.extend([x.strip() for x in c.split(',')] if "," in c else [c])
-    except: pass
+        try: os.link(src, tmp_path)
+        except OSError: shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    finally: remove_quietly(tmp_path) # rename() is a no-op when dst is already a link to src
+
+def rendition_fingerprint(sizes, webp_method):
+    """Short hash of the rendition settings; changes whenever the output would."""
+    return hashlib.sha1(json.dumps([sizes, webp_method]).encode()).hexdigest()[:12]
+
+def is_image_data(data):
+    """Checks that bytes start with a header Pillow understands (does not decode pixels)."""
+    if not data: return False
+    try:
+        Image.open(BytesIO(data))
+        return True
+    except Exception: return False
+
+def image_size(image_bytes):
+    """(width, height) of an image as shown, i.e. after EXIF rotation. Reads the header only."""
+    with Image.open(BytesIO(image_bytes)) as img:
+        w, h = img.size
+        if img.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8): w, h = h, w
+    return w, h
+
+def render_cover_renditions(image_bytes, sizes, webp_method):
+    """Decodes an image once and encodes every cover size as JPEG and WebP.
+
+    Runs in the image process pool, so it takes and returns plain data:
+    ({filename: encoded bytes}, {stage: seconds}).
+    """
+    timings = {}
+    start = time.perf_counter()
+    img = Image.open(BytesIO(image_bytes))
+    sizes = sorted(sizes, key=lambda s: -s[1] * s[2])
+    if img.format == 'JPEG':
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale while still covering the largest size
+        w, h = sizes[0][1], sizes[0][2]
+        if img.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8): w, h = h, w
+        img.draft(None, (w, h))
+    img = ImageOps.exif_transpose(img) # Fix rotation
+    img = img.convert('RGB')
+    timings["image_decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    outputs, previous = [], None
+    for suffix, w, h, q_jpg, q_webp in sizes:
+        if previous and previous.width >= w and previous.height >= h and previous.width * h == previous.height * w:
+            # Same framing, so downscale the bigger rendition instead of the full original
+            resized = previous.resize((w, h), Image.Resampling.BICUBIC)
+        else:
+            resized = ImageOps.fit(img, (w, h), method=Image.Resampling.LANCZOS, centering=(0.5, 0.5))
+        previous = resized
+        outputs.append((f"cover{suffix}.jpg", resized, "JPEG", {"quality": q_jpg, "optimize": True}))
+        outputs.append((f"cover{suffix}.webp", resized, "WEBP", {"quality": q_webp, "method": webp_method}))
+    timings["image_resize"] = time.perf_counter() - start
+
+    def encode(output):
+        name, image, fmt, options = output
+        buf = BytesIO()
+        image.save(buf, fmt, **options)
+        return name, buf.getvalue()
+
+    # Pillow releases the GIL while encoding, so the four files encode side by side
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(outputs)) as pool:
+        files = dict(pool.map(encode, outputs))
+    timings["image_encode"] = time.perf_counter() - start
+    return files, timings
+
+def render_in_pool(image_bytes, sizes, webp_method):
+    """Runs render_cover_renditions in the image pool. Returns {filename: bytes}."""
+    args = (image_bytes, sizes, webp_method)
+    with METRICS.timer("image_render"):
+        try:
+            renditions, timings = image_pool().submit(render_cover_renditions, *args).result()
+        except (BrokenProcessPool, ImportError, PermissionError) as e:
+            # A worker died (e.g. OOM on a huge image) or processes can't start: retry inline
+            print(f"Warning: Image pool unavailable ({e}), rendering inline", flush=True)
+            reset_image_pool()
+            renditions, timings = render_cover_renditions(*args)
+    # Worker-side stages, so the render time splits into decode/resize/encode
+    for stage, seconds in timings.items(): METRICS.record(stage, seconds)
+    return renditions
+
+def save_cover_renditions(image_bytes, recipe_path, keep_source=True, sizes=None):
+    """Renders cover images into a recipe folder. Returns False if the image is unusable.
+
+    A cover set already rendered from the same bytes with the same settings is
+    linked from the image cache instead of being encoded again. `keep_source`
+    also stores the bytes as the bundle's cover_source; `sizes` renders only
+    part of COVER_SIZES.
+    """
+    sizes = sizes or COVER_SIZES
+    digest = IMAGE_CACHE.store_original(image_bytes)
+    fingerprint = rendition_fingerprint(sizes, WEBP_METHOD)
+    cached_dir = IMAGE_CACHE.renditions(digest, fingerprint)
+    METRICS.inc("localtoast_cache_requests_total", cache="renditions", result="hit" if cached_dir else "miss")
+    if cached_dir:
+        try:
+            for name in os.listdir(cached_dir): link_or_copy(os.path.join(cached_dir, name), os.path.join(recipe_path, name))
+            if keep_source: store_cover_source(image_bytes, recipe_path)
+            COVER_LOG.record(os.path.basename(recipe_path), rendition_fingerprint(COVER_SIZES, WEBP_METHOD))
+            return True
+        except OSError as e: print(f"Warning: Failed to reuse cached covers: {e}", flush=True)
+
+    try: renditions = render_in_pool(image_bytes, sizes, WEBP_METHOD)
+    except Exception as e:
+        print(f"Warning: Could not process image: {e}", flush=True)
+        return False
+
+    cached_dir = IMAGE_CACHE.store_renditions(digest, fingerprint, renditions)
+    for name, content in renditions.items():
+        if cached_dir: link_or_copy(os.path.join(cached_dir, name), os.path.join(recipe_path, name))
+        else: write_atomic(os.path.join(recipe_path, name), content)
+    if keep_source: store_cover_source(image_bytes, recipe_path)
+    COVER_LOG.record(os.path.basename(recipe_path), rendition_fingerprint(COVER_SIZES, WEBP_METHOD))
+    return True
+
+# --- ON-DEMAND RENDITIONS ---
+RENDITION_FILE = re.compile(r"cover_(\d+)x(\d+)\.(jpg|webp)")
+RENDITION_LOCKS = HostLimiter(1) # One render per file at a time; the others wait and find it done
+
+def source_dir(slug):
+    """Where a recipe's original cover (cover_source.<ext>) is kept: outside the bundle, so Hugo doesn't publish it."""
+    return os.path.join(DATA_DIR, "sources", slug)
+
+def store_cover_source(image_bytes, recipe_path):
+    """Keeps the original image as the recipe's cover_source.<ext> and drops renditions of the old one."""
+    try: fmt = Image.open(BytesIO(image_bytes)).format or "img"
+    except Exception: fmt = "img"
+    name = "cover_source." + {"JPEG": "jpg", "MPO": "jpg"}.get(fmt, fmt.lower()) # MPO: camera JPEGs
+    slug = os.path.basename(recipe_path)
+    folder = source_dir(slug)
+    os.makedirs(folder, exist_ok=True)
+    for old in glob.glob(os.path.join(folder, "cover_source.*")):
+        if os.path.basename(old) != name: remove_quietly(old)
+    write_atomic(os.path.join(folder, name), image_bytes)
+    drop_bundle_source(slug)
+    drop_renditions(recipe_path)
+
+def move_cover_source(folder, slug):
+    """Moves a cover_source.* out of a bundle folder into source_dir(slug). Returns its new path, or None."""
+    for old in sorted(glob.glob(os.path.join(folder, "cover_source.*"))):
+        path = os.path.join(source_dir(slug), os.path.basename(old))
+        try:
+            os.makedirs(source_dir(slug), exist_ok=True)
+            link_or_copy(old, path) # DATA_DIR may be another volume, so no rename
+        except OSError:
+            if not os.path.exists(path): raise # Another worker may have just moved it
+        remove_quietly(old)
+        return path
+    return None
+
+def drop_bundle_source(slug):
+    """Deletes a cover_source.* left in a bundle (and its published copy) by older versions."""
+    for folder in (os.path.join(CONTENT_DIR, slug), os.path.join(PUBLIC_DIR, "recipes", slug)):
+        for old in glob.glob(os.path.join(folder, "cover_source.*")): remove_quietly(old)
+
+def drop_renditions(recipe_path):
+    """Deletes a bundle's on-demand renditions; they are rendered again when asked for."""
+    slug = os.path.basename(recipe_path)
+    # Older versions also kept them in the bundle
+    for folder in (recipe_path, os.path.join(PUBLIC_DIR, "recipes", slug)):
+        try: names = os.listdir(folder)
+        except OSError: continue
+        for old in names:
+            if RENDITION_FILE.fullmatch(old): remove_quietly(os.path.join(folder, old))
+
+def cover_source(recipe_path):
+    """The image on-demand renditions are cut from: the stored original, else cover.jpg (older bundles)."""
+    slug = os.path.basename(recipe_path)
+    for path in sorted(glob.glob(os.path.join(source_dir(slug), "cover_source.*"))): return path
+    # Older versions kept the original in the bundle, where Hugo published it
+    try: path = move_cover_source(recipe_path, slug)
+    except OSError as e:
+        print(f"Warning: Could not move the cover source of {slug}: {e}", flush=True)
+        path = None
+    if path:
+        drop_bundle_source(slug)
+        return path
+    path = os.path.join(recipe_path, "cover.jpg")
+    return path if os.path.exists(path) else None
+
+def fitting_size(w, h, source_w, source_h):
+    """The largest size with the framing of w x h that a source_w x source_h image covers without upscaling.
+
+    Prefers RENDITION_SIZES, so small covers share files; scales w x h down if none fits.
+    """
+    if w <= source_w and h <= source_h: return w, h
+    fits = [(fw, fh) for fw, fh in RENDITION_SIZES if fw * h == fh * w and fw <= source_w and fh <= source_h]
+    if fits: return max(fits)
+    scale = min(source_w / w, source_h / h)
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+def ensure_rendition(slug, w, h, fmt):
+    """Returns the path of a bundle's cover_<w>x<h>.<fmt>, rendering it on first use.
+
+    Both formats are rendered together (pages ask for WebP and JPEG side by side)
+    straight into the published folder, where Nginx serves the next request
+    itself. Nothing is written to the bundle, so a first view doesn't make Hugo
+    rebuild; if Hugo cleans the folder, they are rendered again when asked for.
+    A size bigger than the source is linked to the largest one it covers.
+    Returns None if the bundle has no cover.
+    """
+    recipe_path = os.path.join(CONTENT_DIR, slug)
+    if not os.path.isdir(recipe_path): return None
+    public_dir = os.path.join(PUBLIC_DIR, "recipes", slug)
+    path = os.path.join(public_dir, f"cover_{w}x{h}.{fmt}")
+    with RENDITION_LOCKS.slot(path):
+        cached = os.path.exists(path)
+        METRICS.inc("localtoast_cache_requests_total", cache="on_demand", result="hit" if cached else "miss")
+        if not cached:
+            source = cover_source(recipe_path)
+            if not source: return None
+            with open(source, "rb") as f: image_bytes = f.read()
+            fw, fh = fitting_size(w, h, *image_size(image_bytes))
+            fitted = os.path.join(public_dir, f"cover_{fw}x{fh}.{fmt}")
+            os.makedirs(public_dir, exist_ok=True)
+            if not os.path.exists(fitted):
+                renditions = render_in_pool(image_bytes, [(f"_{fw}x{fh}", fw, fh, RENDITION_QUALITY, RENDITION_QUALITY)], WEBP_METHOD)
+                for file_name, content in renditions.items(): write_atomic(os.path.join(public_dir, file_name), content)
+            if fitted != path:
+                for ext in ("jpg", "webp"):
+                    link_or_copy(os.path.join(public_dir, f"cover_{fw}x{fh}.{ext}"), os.path.join(public_dir, f"cover_{w}x{h}.{ext}"))
+    return path
+
+def scraper_version():
+    """Installed recipe_scrapers version; cached parses from other versions are redone."""
+    try: return metadata.version("recipe_scrapers")
+    except metadata.PackageNotFoundError: return "unknown"
+
+def normalize_url(url):
+    """Canonical form of a recipe URL for cache keys: no fragment, tracking params or default port."""
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    default_port = {"http": 80, "https": 443}.get(parsed.scheme.lower())
+    if parsed.port and parsed.port != default_port: host = f"{host}:{parsed.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not (k.lower().startswith("utm_") or k.lower() in TRACKING_PARAMS))
+    return urlunparse((parsed.scheme.lower(), host, parsed.path or "/", parsed.params, urlencode(query), ""))
+
+def source_key(url):
+    """normalize_url for user and frontmatter input: None instead of raising on junk."""
+    if not url or not isinstance(url, str): return None
+    try: return normalize_url(url)
+    except ValueError: return None
+
+def fetch_recipe_html(url, deadline, headers=None):
+    """Downloads a recipe page, giving up once the deadline (epoch seconds) passes. Returns (response, html)."""
+    try:
+        with METRICS.timer("page_fetch"): response, body = fetch_capped(url, SCRAPE_MAX_BYTES, deadline=deadline, headers=headers)
+    except TimeoutError: raise TimeoutError(f"Timed out after {SCRAPE_DEADLINE}s")
+    except FetchRejected: raise ValueError("Recipe page is too large.")
+    METRICS.inc("localtoast_fetched_bytes_total", len(body), kind="page")
     
-    cat_raw = scraper.category()
-    if cat_raw:
-        raw_tags.extend([c.strip().lower() for c in cat_raw.split(',') if c.strip()])
+    # Without an explicit charset Requests assumes ISO-8859-1; recipe sites are UTF-8
+    has_charset = 'charset' in response.headers.get('Content-Type', '').lower()
+    encoding = response.encoding if has_charset else 'utf-8'
+    return response, body.decode(encoding or 'utf-8', errors='replace')
 
-    final_tags = list(dict.fromkeys([t.replace('-', ' ').strip().lower() for t in raw_tags if t]))
+def parse_recipe_html(html, url):
+    """Extracts recipe fields from a page using recipe_scrapers."""
+    with METRICS.timer("page_parse"):
+        scraper = scrape_html(html, org_url=url)
+        clean_ing = [clean_ingredient(i) for i in scraper.ingredients()]
         
-    return {
-        "title": scraper.title(), 
-        "image_url": scraper.image(), 
-        "source_url": url,
-        "tags": final_tags, 
-        "ingredients": clean_ing,
-        "instructions": scraper.instructions()
-    }
+        # Combine Host, Cuisine, and Category into Tags
+        raw_tags = [scraper.host()]
+        try:
+            c = scraper.cuisine()
+            if c: raw_tags.extend([x.strip() for x in c.split(',')] if "," in c else [c])
+        except: pass
+        
+        cat_raw = scraper.category()
+        if cat_raw:
+            raw_tags.extend([c.strip().lower() for c in cat_raw.split(',') if c.strip()])
+
+        final_tags = list(dict.fromkeys([t.replace('-', ' ').strip().lower() for t in raw_tags if t]))
+            
+        return {
+            "title": scraper.title(), 
+            "image_url": scraper.image(), 
+            "source_url": url,
+            "tags": final_tags, 
+            "ingredients": clean_ing,
+            "instructions": scraper.instructions()
+        }
+
+def scrape_recipe_data(url, deadline=None):
+    """Scrapes data using recipe_scrapers library, served from the page cache when possible."""
+    if deadline is None: deadline = time.time() + SCRAPE_DEADLINE
+    key = normalize_url(url)
+    cached = PAGE_CACHE.get(key)
+    
+    if cached and cached["fresh"]:
+        METRICS.inc("localtoast_cache_requests_total", cache="page", result="hit")
+        data = cached["data"] or parse_recipe_html(cached["html"], url)
+        if not cached["data"]: PAGE_CACHE.put(key, cached["html"], cached["etag"], cached["last_modified"], data)
+        return {**data, "source_url": url}
+    
+    # Stale (or missing): ask the site whether the page changed
+    headers = {}
+    if cached and cached["etag"]: headers["If-None-Match"] = cached["etag"]
+    if cached and cached["last_modified"]: headers["If-Modified-Since"] = cached["last_modified"]
+    response, html = fetch_recipe_html(url, deadline, headers=headers or None)
+    
+    if response.status_code == 304 and cached:
+        METRICS.inc("localtoast_cache_requests_total", cache="page", result="revalidated")
+        html = cached["html"]
+        data = cached["data"] or parse_recipe_html(html, url)
+        etag = response.headers.get("ETag") or cached["etag"]
+        last_modified = response.headers.get("Last-Modified") or cached["last_modified"]
+    else:
+        METRICS.inc("localtoast_cache_requests_total", cache="page", result="stale" if cached else "miss")
+        data = parse_recipe_html(html, url)
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    PAGE_CACHE.put(key, html, etag, last_modified, data)
+    return {**data, "source_url": url}
+
+def stage_url(idx, url):
+    """Validates and scrapes one bulk URL, returning its staged item (never raises)."""
+    # Already imported: no DNS, no fetch, no parse
+    existing = RECIPE_INDEX.find_source(url)
+    if existing:
+        return {"id": idx, "success": True, "url": url, "title": existing["title"], "proposed_slug": existing["slug"], "is_duplicate": True, "existing_slug": existing["slug"]}
+    if not is_safe_url(url):
+        return {"id": idx, "success": False, "url": url, "message": "Unsafe URL"}
+    try:
+        # The clock starts once HOST_QUEUE runs us, so queueing behind the same site is free
+        data = scrape_recipe_data(url, deadline=time.time() + SCRAPE_DEADLINE)
+        slug = generate_slug(data['title'])
+        return {
+            "id": idx, "success": True, "title": data['title'], "url": url,
+            "proposed_slug": slug, "is_duplicate": os.path.exists(os.path.join(CONTENT_DIR, slug)),
+            "tags": ", ".join(data['tags']),
+            "data": data
+        }
+    except Exception as e:
+        return {"id": idx, "success": False, "url": url, "message": str(e)}
+
+def stage_urls(lines, on_item=None):
+    """Scrapes pasted URLs concurrently, a few per site. Items keep their line index and input order."""
+    urls = [(idx, line.strip()) for idx, line in enumerate(lines) if line.strip()]
+    futures = [HOST_QUEUE.submit(url_hostname(url), stage_url, idx, url) for idx, url in urls]
+    if on_item:
+        for f in futures: f.add_done_callback(lambda f: on_item(f.result()))
+    return [f.result() for f in futures]
+
+def run_batch_job(job, batch_id, *args):
+    """Runs a bulk job on JOB_POOL. If it dies, the batch is marked failed so the page stops polling."""
+    try: job(batch_id, *args)
+    except Exception as e:
+        print(f"Warning: Bulk job for batch {batch_id} failed: {e}", flush=True)
+        try: BATCHES.advance(batch_id, "failed", message=f"The import stopped unexpectedly: {e}")
+        except Exception as e: print(f"Warning: Could not mark batch {batch_id} as failed: {e}", flush=True)
+
+def run_staging_job(batch_id, lines):
+    """Background job: scrapes a batch, then hands it over for review."""
+    wait_for_index() # Known source URLs are skipped
+    with METRICS.timer("bulk_staging"):
+        items = stage_urls(lines, on_item=lambda item: BATCHES.progress(batch_id, item['success']))
+    for item in items:
+        METRICS.inc("localtoast_bulk_items_total", result="known" if item.get("existing_slug") else "ok" if item["success"] else "failed")
+    BATCHES.advance(batch_id, "review", expected="staging", items=items)
+
+def run_commit_job(batch_id, items, updates_map):
+    """Background job: saves every reviewed recipe of a batch, several at a time."""
+    saved = []
+    def commit_item(item):
+        recipe_data = item['data']
+        if item['id'] in updates_map:
+             recipe_data['tags'] = updates_map[item['id']] # Update tags with user edits
+
+        try:
+            with METRICS.timer("save"): success, slug, saved_meta = process_and_save_recipe(recipe_data)
+        except Exception as e:
+            success = False
+            print(f"Warning: Failed to save {item['url']}: {e}")
+        if success: saved.append(slug)
+        BATCHES.progress(batch_id, success)
+
+    # Downloads overlap while the image pool keeps every core busy encoding
+    committable = [i for i in items if i.get("success") and not i.get("is_duplicate")]
+    METRICS.observe("localtoast_batch_size", len(committable), buckets=Metrics.SIZE_BUCKETS, stage="commit")
+    with METRICS.timer("bulk_commit"), ThreadPoolExecutor(max_workers=SAVE_WORKERS, thread_name_prefix="save") as pool:
+        list(pool.map(commit_item, committable))
+
+    # One wait for the whole batch; Hugo's poller folds the burst into a few partial builds
+    wait_for_publish(saved=saved)
+    # Scraped data is no longer needed, only the counters for the last status polls
+    BATCHES.advance(batch_id, "done", items=[])
 
 def process_and_save_recipe(data, original_slug=None):
     """Saves recipe to disk, processing images and frontmatter."""
@@ -217,57 +1933,47 @@ def process_and_save_recipe(data, original_slug=None):
         slug = generate_slug(title)
         recipe_path = os.path.join(CONTENT_DIR, slug)
         
-        # Duplicate protection
-        if os.path.exists(recipe_path):
-            if not original_slug or original_slug != slug:
-                return False, f"Recipe '{title}' already exists.", None
-
-        os.makedirs(recipe_path, exist_ok=True)
+        # Duplicate protection (mkdir is atomic, so parallel bulk saves can't both claim a slug)
+        if not original_slug or original_slug != slug:
+            try: os.makedirs(recipe_path)
+            except FileExistsError: return False, f"Recipe '{title}' already exists.", None
+        else:
+            os.makedirs(recipe_path, exist_ok=True)
         
-        # Image Processing
-        original_img = None
+        # Image Processing: an upload wins, otherwise download the image URL
+        has_image = False
         if data.get('image_bytes'):
-            try:
-                img_stream = BytesIO(data['image_bytes'])
-                original_img = Image.open(img_stream)
-                original_img.verify()
-                img_stream.seek(0)
-                original_img = Image.open(img_stream)
-                original_img = ImageOps.exif_transpose(original_img) # Fix rotation
-                original_img = original_img.convert('RGB')
-            except Exception: original_img = None
-
-        if not original_img:
-            original_img = download_image_with_fallback(data.get('image_url'), data.get('source_url'))
+            has_image = save_cover_renditions(data['image_bytes'], recipe_path)
+        if not has_image:
+            image_bytes = download_image_with_fallback(data.get('image_url'), data.get('source_url'))
+            has_image = bool(image_bytes) and save_cover_renditions(image_bytes, recipe_path)
 
         # If we didn't upload/download a NEW image, but we are moving folders (renaming),
         # we must copy the old images to the new folder.
-        if not original_img and original_slug and original_slug != slug:
+        if not has_image and original_slug and original_slug != slug:
             old_dir = os.path.join(CONTENT_DIR, original_slug)
             if os.path.exists(old_dir):
                 # Look for cover.jpg, cover.webp, cover_small.jpg, etc.
                 for img_file in glob.glob(os.path.join(old_dir, "cover*.*")):
                     try:
-                        shutil.copy2(img_file, recipe_path)
+                        # The old folder is deleted right after, so a hardlink is as good as a copy
+                        link_or_copy(img_file, os.path.join(recipe_path, os.path.basename(img_file)))
                     except Exception as e:
                         print(f"Warning: Failed to copy image {img_file}: {e}")
+            for img_file in glob.glob(os.path.join(source_dir(original_slug), "cover_source.*")):
+                try:
+                    os.makedirs(source_dir(slug), exist_ok=True)
+                    link_or_copy(img_file, os.path.join(source_dir(slug), os.path.basename(img_file)))
+                except Exception as e:
+                    print(f"Warning: Failed to copy image {img_file}: {e}")
 
         # Fallback to default if no image found/uploaded
-        img_filename_jpg = "cover.jpg" if original_img else (data.get('existing_image') or "")
-        if not img_filename_jpg and not original_img:
+        img_filename_jpg = "cover.jpg" if has_image else (data.get('existing_image') or "")
+        if not img_filename_jpg:
             try: 
-                original_img = Image.open("/app/default.jpg").convert('RGB')
-                img_filename_jpg = "cover.jpg"
-            except: pass
-
-        # Save Image Variants (WebP + JPG)
-        if original_img:
-            sizes = [("", 800, 600, 80, 80), ("_small", 400, 300, 50, 50)]
-            for suffix, w, h, q_jpg, q_webp in sizes:
-                resample = Image.Resampling.BICUBIC if suffix == "_small" else Image.Resampling.LANCZOS
-                resized = ImageOps.fit(original_img, (w, h), method=resample, centering=(0.5, 0.5))
-                resized.save(os.path.join(recipe_path, f"cover{suffix}.jpg"), "JPEG", quality=q_jpg, optimize=True)
-                resized.save(os.path.join(recipe_path, f"cover{suffix}.webp"), "WEBP", quality=q_webp, method=6)
+                with open("/app/default.jpg", "rb") as f:
+                    if save_cover_renditions(f.read(), recipe_path): img_filename_jpg = "cover.jpg"
+            except OSError: pass
         
         # Save Markdown
         tags_list = data.get('tags', [])
@@ -284,52 +1990,378 @@ def process_and_save_recipe(data, original_slug=None):
 
         md_content = f"""---\n{yaml.dump(frontmatter)}\n---\n## Ingredients\n{chr(10).join([f'- {i}' for i in data['ingredients']])}\n\n## Instructions\n{data['instructions']}\n"""
         
-        with open(os.path.join(recipe_path, "index.md"), "w") as f: f.write(md_content)
+        with METRICS.timer("disk_write"):
+            with open(os.path.join(recipe_path, "index.md"), "w") as f: f.write(md_content)
+            RECIPE_INDEX.update(slug)
         return True, slug, {"tags": tags_list}
         
     except Exception as e: return False, str(e), None
 
+def parse_recipe_bundle(slug, path):
+    """Parses a recipe's index.md into the editor's fields."""
+    fm, body = read_recipe_file(path)
+    ingredients, instructions = parse_recipe_sections(body)
+    tags = fm.get('tags') or []
+    if isinstance(tags, str): tags = [tags]
+    return {
+        "title": fm.get('title', ''), 
+        "slug": slug, 
+        "existing_image": fm.get('image', ''), 
+        "source_url": fm.get('source_url', ''),
+        "tags": ", ".join(str(t) for t in tags),
+        "raw_tags_list": [str(t) for t in tags],
+        "ingredients": "\n".join(ingredients), 
+        "instructions": instructions
+    }
+
+def copy_recipe(data):
+    """Copy of a cached recipe that callers may modify freely."""
+    return {**data, "raw_tags_list": list(data["raw_tags_list"])}
+
 def load_existing_recipe(slug):
-    """Parses a markdown file and returns recipe data."""
+    """Returns recipe data for the editor (cached until the file changes)."""
+    if not slug or "/" in slug or slug.startswith('.'): return None
+    return RECIPE_CACHE.get(slug)
+
+# --- ARCHIVES ---
+BUNDLE_FILE = re.compile(r"index\.md|cover[a-z0-9_]*\.[a-z0-9]+") # What a bundle may contain
+
+class ChunkReader(RawIOBase):
+    """Readable file over chunks pushed in by another thread (an upload streamed into tarfile).
+
+    `put` blocks while ARCHIVE_QUEUE chunks are waiting, so a slow import holds the
+    upload back instead of buffering it. Once the reader is closed `put` returns False.
+    """
+    def __init__(self):
+        super().__init__()
+        self._queue = queue.Queue(ARCHIVE_QUEUE)
+        self._chunk = memoryview(b"")
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def put(self, chunk):
+        """Queues a chunk (None marks the end)."""
+        while not self.closed:
+            try:
+                self._queue.put(chunk, timeout=0.5)
+                return True
+            except queue.Full: continue
+        return False
+
+    def readinto(self, buffer):
+        while not self._chunk:
+            if self._eof: return 0
+            chunk = self._queue.get()
+            if chunk is None: self._eof = True
+            else: self._chunk = memoryview(chunk)
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+def export_archive():
+    """Yields a tar of every recipe bundle (recipes/<slug>/<file>), a chunk at a time.
+
+    Headers are written by hand so no file is ever held in memory whole. The
+    cover source is packed into its bundle. On-demand renditions are left out;
+    they are rendered again from cover_source when asked for.
+    """
+    try: slugs = sorted(e.name for e in os.scandir(CONTENT_DIR) if e.is_dir() and not e.name.startswith('.'))
+    except FileNotFoundError: slugs = []
+    for slug in slugs:
+        folder = os.path.join(CONTENT_DIR, slug)
+        try: files = {name: os.path.join(folder, name) for name in os.listdir(folder)}
+        except OSError: continue # Deleted while exporting
+        try: files.update((name, os.path.join(source_dir(slug), name)) for name in os.listdir(source_dir(slug)))
+        except OSError: pass
+        for name, path in sorted(files.items()):
+            if not BUNDLE_FILE.fullmatch(name) or RENDITION_FILE.fullmatch(name): continue
+            try: f = open(path, "rb")
+            except OSError: continue
+            with f:
+                info = tarfile.TarInfo(f"recipes/{slug}/{name}")
+                stat = os.fstat(f.fileno())
+                info.size, info.mtime, info.mode = stat.st_size, int(stat.st_mtime), 0o644
+                yield info.tobuf(tarfile.PAX_FORMAT)
+                remaining = info.size
+                while remaining > 0:
+                    # A file that shrank mid-export is padded to the size already promised in its header
+                    chunk = f.read(min(ARCHIVE_CHUNK, remaining)) or bytes(min(ARCHIVE_CHUNK, remaining))
+                    remaining -= len(chunk)
+                    yield chunk
+                if info.size % tarfile.BLOCKSIZE: yield bytes(tarfile.BLOCKSIZE - info.size % tarfile.BLOCKSIZE)
+    yield bytes(2 * tarfile.BLOCKSIZE)
+
+def check_bundle(folder):
+    """Returns why an unpacked bundle can't be imported, or None if it looks sound."""
     try:
-        path = os.path.join(CONTENT_DIR, slug, "index.md")
-        with open(path, 'r') as f: content = f.read()
-        parts = content.split('---', 2)
-        if len(parts) < 3: return None
-        fm = yaml.safe_load(parts[1])
-        body = parts[2]
-        
-        # Regex to extract sections
-        ing_match = re.search(r'## Ingredients\n(.*?)\n## Instructions', body, re.DOTALL)
-        ingredients = [line.lstrip('- ').strip() for line in ing_match.group(1).strip().split('\n')] if ing_match else []
-        
-        inst_match = re.search(r'## Instructions\n(.*)', body, re.DOTALL)
-        instructions = inst_match.group(1).strip() if inst_match else ""
-        
-        return {
-            "title": fm.get('title', ''), 
-            "slug": slug, 
-            "existing_image": fm.get('image', ''), 
-            "source_url": fm.get('source_url', ''),
-            "tags": ", ".join(fm.get('tags', [])),
-            "raw_tags_list": fm.get('tags', []),
-            "ingredients": "\n".join(ingredients), 
-            "instructions": instructions
-        }
-    except Exception: return None
+        fm, _ = read_recipe_file(os.path.join(folder, "index.md"))
+    except FileNotFoundError: return "Missing index.md"
+    except (OSError, UnicodeDecodeError, ValueError, yaml.YAMLError) as e: return f"Unreadable index.md: {e}"
+    if not str(fm.get("title") or "").strip(): return "Recipe has no title"
+    for name in os.listdir(folder):
+        if name == "index.md": continue
+        with open(os.path.join(folder, name), "rb") as f:
+            if not looks_like_image(f.read(1024)): return f"{name} is not an image"
+    return None
+
+def import_archive(reader, replace=False):
+    """Restores bundles from a tar (optionally compressed) read through `reader`.
+
+    Everything is unpacked into a hidden staging folder and checked first, so a
+    broken upload changes nothing. Valid bundles are then moved in together,
+    the index (and tag counts) are synced once and Hugo gets a single publish
+    wait. Existing recipes are skipped unless `replace` is set.
+    """
+    staging = os.path.join(CONTENT_DIR, f".import-{uuid.uuid4().hex}")
+    invalid, skipped, installed = {}, [], []
+    try:
+        os.makedirs(staging)
+        try:
+            with tarfile.open(fileobj=reader, mode="r|*") as tar:
+                for member in tar:
+                    parts = [p for p in member.name.split("/") if p not in ("", ".")]
+                    if len(parts) == 3 and parts[0] == "recipes": parts = parts[1:]
+                    if len(parts) != 2 or not member.isfile(): continue
+                    slug, name = parts
+                    if slug.startswith('.') or "\\" in slug or slug in invalid: continue
+                    if not BUNDLE_FILE.fullmatch(name) or RENDITION_FILE.fullmatch(name): continue
+                    if member.size > (RECIPE_MAX_BYTES if name == "index.md" else IMAGE_MAX_BYTES):
+                        invalid[slug] = f"{name} is too large"
+                        continue
+                    os.makedirs(os.path.join(staging, slug), exist_ok=True)
+                    with open(os.path.join(staging, slug, name), "wb") as f:
+                        shutil.copyfileobj(tar.extractfile(member), f, ARCHIVE_CHUNK)
+        except (tarfile.TarError, EOFError, zlib.error) as e:
+            return {"success": False, "message": f"Unreadable archive: {e}"}
+
+        pending = []
+        for slug in sorted(os.listdir(staging)):
+            if slug in invalid: continue
+            problem = check_bundle(os.path.join(staging, slug))
+            if problem: invalid[slug] = problem
+            elif os.path.exists(os.path.join(CONTENT_DIR, slug)) and not replace: skipped.append(slug)
+            else: pending.append(slug)
+
+        with METRICS.timer("import_install"):
+            for slug in pending:
+                target = os.path.join(CONTENT_DIR, slug)
+                try:
+                    if os.path.exists(target):
+                        os.rename(target, os.path.join(staging, f".old-{slug}"))
+                        unpublish_recipe(slug)
+                    shutil.rmtree(source_dir(slug), ignore_errors=True)
+                    move_cover_source(os.path.join(staging, slug), slug)
+                    os.rename(os.path.join(staging, slug), target)
+                except OSError as e:
+                    invalid[slug] = f"Could not install: {e}"
+                    continue
+                RECIPE_CACHE.discard(slug)
+                installed.append(slug)
+            if installed: RECIPE_INDEX.sync()
+        METRICS.inc("localtoast_import_bundles_total", len(installed), result="imported")
+        METRICS.inc("localtoast_import_bundles_total", len(skipped), result="skipped")
+        METRICS.inc("localtoast_import_bundles_total", len(invalid), result="invalid")
+        if installed: wait_for_publish(saved=installed)
+        return {"success": True, "imported": len(installed), "skipped": skipped, "invalid": invalid}
+    finally:
+        reader.close()
+        shutil.rmtree(staging, ignore_errors=True)
+
+# --- MAINTENANCE ---
+def cover_set_files(recipe_path):
+    """{name: size} of a bundle's saved cover set (not cover_source or on-demand sizes)."""
+    files = {}
+    for entry in os.scandir(recipe_path):
+        name = entry.name
+        if not re.fullmatch(r"cover[a-z0-9_]*\.(jpg|webp)", name): continue
+        if name.startswith("cover_source.") or RENDITION_FILE.fullmatch(name): continue
+        files[name] = entry.stat().st_size
+    return files
+
+def reencode_bundle(slug, fingerprint, force=False):
+    """Renders one bundle's cover set again from its cover source with the current settings.
+
+    Returns (status, bytes before, bytes after, sizes skipped); status is "done",
+    "current", "no_cover" or "failed". Sizes bigger than the source keep their
+    old files instead of being upscaled.
+    """
+    recipe_path = os.path.join(CONTENT_DIR, slug)
+    if not force and COVER_LOG.is_current(slug, fingerprint): return "current", 0, 0, 0
+    source = cover_source(recipe_path)
+    if not source: return "no_cover", 0, 0, 0
+    if os.path.basename(source) == "cover.jpg":
+        # Legacy bundle: keep today's pixels as the source, or every run would re-compress its own output
+        os.makedirs(source_dir(slug), exist_ok=True)
+        legacy = os.path.join(source_dir(slug), "cover_source.jpg")
+        link_or_copy(source, legacy)
+        source = legacy
+    before = cover_set_files(recipe_path)
+    with open(source, "rb") as f: image_bytes = f.read()
+    try: width, height = image_size(image_bytes)
+    except Exception as e:
+        print(f"Warning: Could not read the cover of {slug}: {e}", flush=True)
+        return "failed", 0, 0, 0
+    sizes = [size for size in COVER_SIZES if size[1] <= width and size[2] <= height]
+    skipped = len(COVER_SIZES) - len(sizes)
+    if not sizes: COVER_LOG.record(slug, fingerprint)
+    elif not save_cover_renditions(image_bytes, recipe_path, keep_source=False, sizes=sizes): return "failed", 0, 0, 0
+    current = {f"cover{suffix}.{ext}" for suffix, *_ in COVER_SIZES for ext in ("jpg", "webp")}
+    # Sizes no longer in COVER_SIZES
+    for name in before:
+        if name not in current: remove_quietly(os.path.join(recipe_path, name))
+    drop_renditions(recipe_path)
+    return "done", sum(before.values()), sum(cover_set_files(recipe_path).values()), skipped
+
+def reencode_covers(workers, force=False):
+    """Re-renders every bundle's covers with the current COVER_SIZES and WEBP_METHOD.
+
+    Bundles render `workers` at a time on the image pool. Each finished bundle
+    is recorded in COVER_LOG, so an interrupted run resumes where it stopped.
+    Prints progress and the bytes saved.
+    """
+    fingerprint = rendition_fingerprint(COVER_SIZES, WEBP_METHOD)
+    try: slugs = sorted(e.name for e in os.scandir(CONTENT_DIR) if e.is_dir() and not e.name.startswith('.'))
+    except FileNotFoundError: slugs = []
+    counts, before, after, skipped = Counter(), 0, 0, 0
+    start = time.time()
+    print(f"Re-encoding covers of {len(slugs)} recipes with {workers} workers (settings {fingerprint})", flush=True)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reencode") as pool:
+        futures = {pool.submit(reencode_bundle, slug, fingerprint, force): slug for slug in slugs}
+        for i, future in enumerate(as_completed(futures), 1):
+            try: status, old_bytes, new_bytes, small = future.result()
+            except Exception as e:
+                print(f"Warning: Could not re-encode {futures[future]}: {e}", flush=True)
+                status, old_bytes, new_bytes, small = "failed", 0, 0, 0
+            counts[status] += 1
+            skipped += small
+            before += old_bytes
+            after += new_bytes
+            if i % 100 == 0: print(f"{i}/{len(slugs)} recipes, {(before - after) / 1e6:.1f} MB saved so far", flush=True)
+    saved = before - after
+    print(
+        f"Re-encoded {counts['done']} recipes in {time.time() - start:.1f}s "
+        f"({counts['current']} already current, {counts['no_cover']} without a cover, {counts['failed']} failed). "
+        f"Skipped {skipped} cover sizes bigger than their source instead of upscaling. "
+        f"Covers went from {before / 1e6:.1f} MB to {after / 1e6:.1f} MB: "
+        f"{saved / 1e6:.1f} MB saved ({100 * saved / before if before else 0:.0f}%).",
+        flush=True
+    )
+    return counts, before, after
 
 # ==============================================================================
 # API ENDPOINTS
 # ==============================================================================
 
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """Times every request by route; with SERVER_TIMING, also reports its stages in a header."""
+    timings = [] if SERVER_TIMING else None
+    token = REQUEST_TIMINGS.set(timings)
+    start = time.perf_counter()
+    try: response = await call_next(request)
+    finally: REQUEST_TIMINGS.reset(token)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    METRICS.observe("localtoast_request_seconds", elapsed, route=route.path if route else "unmatched", method=request.method)
+    if timings is not None:
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings] + [f"total;dur={elapsed * 1000:.1f}"]
+        response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+def warm_up():
+    """Start-up work that runs while requests are already served.
+
+    Syncs the recipe index, then loads the heavy libraries so the first scrape
+    or save doesn't pay for them.
+    """
+    try:
+        try:
+            with STARTUP.timer("index sync"): rebuild_taxonomy_cache()
+        finally: STARTUP.indexed.set()
+        for module in (yaml, requests, HTTP, Image, ImageFile, ImageOps, ExifTags, recipe_scrapers): module._resolve()
+    except Exception as e: print(f"Warning: Warm-up failed: {e}", flush=True)
+    finally: STARTUP.warmed.set()
+    timings = ", ".join(f"{p['phase']} {p['ms']:.0f} ms" for p in STARTUP.report()["phases"])
+    print(f"Warm after {STARTUP.since_start() * 1000:.0f} ms ({timings})", flush=True)
+
+def wait_for_index():
+    """Holds a request that reads the recipe index until the startup sync has filled it.
+
+    Only while a warm-up is running (the startup event has fired); gives up after INDEX_WAIT_TIMEOUT.
+    """
+    if STARTUP.ready is not None and not STARTUP.indexed.wait(INDEX_WAIT_TIMEOUT):
+        print("Warning: Serving before the recipe index finished syncing", flush=True)
+
 @app.on_event("startup")
 def startup_event():
-    rebuild_taxonomy_cache()
+    with STARTUP.timer("startup"): METRICS.start_sharing()
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    STARTUP.ready = STARTUP.since_start()
+    print(f"Serving after {STARTUP.ready * 1000:.0f} ms, warming up in the background", flush=True)
 
 @app.get("/")
 def health_check():
     return {"status": "Ingester is running"}
 
+@app.get("/recipes/{slug}/{filename}")
+def cover_rendition(slug: str, filename: str):
+    """Nginx falls through to here when a cover_<w>x<h>.<jpg|webp> isn't published yet."""
+    match = RENDITION_FILE.fullmatch(filename)
+    if not match or not slug or "/" in slug or slug.startswith('.'): return HTMLResponse("Not found", status_code=404)
+    w, h, fmt = int(match[1]), int(match[2]), match[3]
+    if (w, h) not in RENDITION_SIZES: return HTMLResponse("Size not available", status_code=404)
+    try: path = ensure_rendition(slug, w, h, fmt)
+    except Exception as e:
+        print(f"Warning: Could not render {slug}/{filename}: {e}", flush=True)
+        path = None
+    if not path: return HTMLResponse("Not found", status_code=404)
+    media_type = "image/webp" if fmt == "webp" else "image/jpeg"
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": "public, max-age=2592000, immutable"})
+
+@app.get("/export")
+def export_cookbook():
+    """Downloads every recipe bundle as one tar, streamed."""
+    filename = f"localtoast-{datetime.now().strftime('%Y-%m-%d')}.tar"
+    return StreamingResponse(export_archive(), media_type="application/x-tar", headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.post("/import")
+async def import_cookbook(request: Request, replace: bool = False):
+    """Restores a backup made by /export. The request body is the raw .tar (or .tar.gz)."""
+    reader = ChunkReader()
+    job = asyncio.ensure_future(run_in_threadpool(import_archive, reader, replace))
+    try:
+        async for chunk in request.stream():
+            if chunk and not await run_in_threadpool(reader.put, chunk): break
+    finally:
+        await run_in_threadpool(reader.put, None)
+    try:
+        result = await job
+        return JSONResponse(result, status_code=200 if result["success"] else 400)
+    except Exception as e: return JSONResponse({"success": False, "message": str(e)}, status_code=500)
+
+@app.get("/startup")
+def startup_profile():
+    """This worker's startup profile: import, ready and warm-up timings."""
+    return STARTUP.report()
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/tag-suggest")
+def suggest_tags(q: str = "", k: int = TAG_SUGGESTIONS, check: str = None):
+    wait_for_index()
+    """Autocomplete: most used tags starting with q. `check` (comma separated) reports if all are known."""
+    RECIPE_INDEX.load_tags()
+    result = {"tags": TAG_INDEX.suggest(q, max(1, min(k, TAG_SUGGESTIONS)))}
+    if check is not None:
+        terms = [t.strip() for t in check.split(',') if t.strip()]
+        result["exists"] = bool(terms) and TAG_INDEX.exists(terms)
+    return result
+
 @app.post("/check-title")
 def check_title_availability(title: str = Form(...), original_slug: str = Form(None)):
     slug = generate_slug(title)
@@ -339,7 +2371,7 @@ def check_title_availability(title: str = Form(...), original_slug: str = Form(N
 
 @app.post("/edit")
 def edit_recipe(request: Request, slug: str = Form(None)):
-    context = {"request": request, "known_tags": get_cached_tags(), "error": None}
+    context = {"request": request, "error": None}
     if slug:
         data = load_existing_recipe(slug)
         if data: context.update(data)
@@ -348,14 +2380,23 @@ def edit_recipe(request: Request, slug: str = Form(None)):
 
 @app.post("/stage")
 def stage_recipe(request: Request, url: str = Form(None)):
+    context = {"request": request, "source_url": url, "error": None}
+    # Already imported: open the saved copy instead of scraping it again
+    wait_for_index()
+    existing = RECIPE_INDEX.find_source(url)
+    data = load_existing_recipe(existing["slug"]) if existing else None
+    if data:
+        context.update(data)
+        context["notice"] = "This recipe was already imported, so you're editing the saved copy."
+        return templates.TemplateResponse(request=request, name="editor.html", context=context)
+    
     if not url or not is_safe_url(url): 
         return templates.TemplateResponse(
             request=request, 
             name="editor.html", 
-            context={"known_tags": get_cached_tags(), "error": "Invalid URL"}
+            context={"error": "Invalid URL"}
         )
 
-    context = {"request": request, "known_tags": get_cached_tags(), "source_url": url, "error": None}
     try:
         scraped = scrape_recipe_data(url)
         # Convert lists to strings for the textarea inputs
@@ -382,104 +2423,118 @@ async def save_recipe(
     if not ingredients.strip() or not instructions.strip():
         return JSONResponse(status_code=400, content={"success": False, "message": "Missing content."})
 
-    # Data Construction
+    # Data Construction (cached, async DNS checks; nothing blocks the event loop)
+    image_url_ok, source_url_ok = await asyncio.gather(is_safe_url_async(image_url), is_safe_url_async(source_url))
     data = {
         "title": title, 
-        "image_url": image_url if is_safe_url(image_url) else None, 
+        "image_url": image_url if image_url_ok else None, 
         "image_bytes": await file.read() if file and file.filename else None, 
         "existing_image": existing_image,
-        "source_url": source_url if is_safe_url(source_url) else None, 
+        "source_url": source_url if source_url_ok else None, 
         "tags": [html.escape(t.strip()) for t in tags.split(',') if t.strip()],
         "ingredients": [html.escape(l.strip()) for l in ingredients.split('\n') if l.strip()],
         "instructions": html.escape(instructions)
     }
 
-    # Save
-    success, result_slug, saved_meta = process_and_save_recipe(data, original_slug)
+    # Save (download, image processing and disk writes)
+    with METRICS.timer("save"):
+        success, result_slug, saved_meta = await run_in_threadpool(process_and_save_recipe, data, original_slug)
     
     if success:
-        # Cleanup old folder if renamed
-        if original_slug and result_slug != original_slug:
-            shutil.rmtree(os.path.join(CONTENT_DIR, original_slug), ignore_errors=True)
-        
-        # Update Cache & Trigger Rebuild
-        old_data = load_existing_recipe(original_slug) if original_slug else None
-        update_taxonomy_counters(old_tags=old_data['raw_tags_list'] if old_data else [], new_tags=saved_meta['tags'])
-        trigger_hugo_rebuild()
-        
-        # Wait for Nginx/Hugo availability
-        check_url = f"{HUGO_INTERNAL_URL}/recipes/{result_slug}/"
-        for _ in range(20): # Wait up to 10 seconds
-            try:
-                if requests.get(check_url, timeout=0.5).status_code == 200: break
-            except: pass
-            time.sleep(0.5)
-            
+        await run_in_threadpool(finish_save, result_slug, original_slug)
+        # Wait for Hugo to render the page before redirecting to it
+        await run_in_threadpool(wait_for_publish, saved=[result_slug])
         return JSONResponse(content={"success": True, "redirect_url": f"/recipes/{result_slug}/"})
     else:
         return JSONResponse(status_code=400, content={"success": False, "message": result_slug})
 
+def finish_save(result_slug, original_slug):
+    """Post-save bookkeeping: drops a renamed recipe's old folder (its index rows and tag counts go with it)."""
+    if original_slug and result_slug != original_slug:
+        shutil.rmtree(os.path.join(CONTENT_DIR, original_slug), ignore_errors=True)
+        shutil.rmtree(source_dir(original_slug), ignore_errors=True)
+        RECIPE_INDEX.remove(original_slug)
+        RECIPE_CACHE.discard(original_slug)
+        unpublish_recipe(original_slug)
+
+def render_bulk_page(request, batch_id, batch):
+    wait_for_index()
+    # Initial "existing tag" badges, so the page doesn't check every row over XHR
+    RECIPE_INDEX.load_tags()
+    known = {i['id']: TAG_INDEX.exists([t for t in i['tags'].split(',') if t.strip()]) for i in batch['items'] if i.get('tags')}
+    context = {"batch_id": batch_id, "pending": batch['stage'] == "staging", "results": batch['items'], "known_tags": known}
+    return templates.TemplateResponse(request=request, name="bulk_results.html", context=context)
+
 @app.post("/bulk")
 def bulk_import(request: Request, urls: str = Form(None)):
-    cleanup_expired_batches()
     if not urls: return RedirectResponse(url="/add", status_code=303)
     
-    batch_id = str(uuid.uuid4())
-    staged_items = []
-    
-    for idx, url in enumerate(urls.split('\n')):
-        url = url.strip()
-        if not url: continue
-        
-        if not is_safe_url(url):
-            staged_items.append({"id": idx, "success": False, "url": url, "message": "Unsafe URL"})
-            continue
+    lines = urls.split('\n')
+    total = len([l for l in lines if l.strip()])
+    METRICS.observe("localtoast_batch_size", total, buckets=Metrics.SIZE_BUCKETS, stage="staging")
+    batch_id = BATCHES.create(total=total)
+    JOB_POOL.submit(run_batch_job, run_staging_job, batch_id, lines)
+    return render_bulk_page(request, batch_id, BATCHES.get(batch_id))
 
-        try:
-            data = scrape_recipe_data(url)
-            slug = generate_slug(data['title'])
-            staged_items.append({
-                "id": idx, "success": True, "title": data['title'], "url": url,
-                "proposed_slug": slug, "is_duplicate": os.path.exists(os.path.join(CONTENT_DIR, slug)),
-                "tags": ", ".join(data['tags']),
-                "data": data
-            })
-        except Exception as e:
-            staged_items.append({"id": idx, "success": False, "url": url, "message": str(e)})
-            
-    PENDING_BATCHES[batch_id] = {"timestamp": time.time(), "items": staged_items}    
-    return templates.TemplateResponse(
-        request=request, 
-        name="bulk_results.html", 
-        context={"results": staged_items, "batch_id": batch_id, "known_tags": get_cached_tags()}
-    )
+@app.get("/bulk")
+def bulk_review(request: Request, batch_id: str = None):
+    batch = BATCHES.get(batch_id) if batch_id else None
+    if not batch or batch['stage'] not in ("staging", "review"): return RedirectResponse(url="/add", status_code=303)
+    return render_bulk_page(request, batch_id, batch)
+
+@app.get("/bulk-status")
+def bulk_status(batch_id: str):
+    status = BATCHES.status(batch_id)
+    if not status:
+        return JSONResponse(status_code=404, content={"success": False, "message": "Batch expired."})
+    if status["stage"] == "failed":
+        return JSONResponse(status_code=500, content={"success": False, "message": status["message"]})
+    return {"success": True, **status}
 
 @app.post("/bulk-commit")
 def bulk_commit(payload: BulkCommitPayload):
-    if payload.batch_id not in PENDING_BATCHES:
+    batch = BATCHES.get(payload.batch_id)
+    if not batch:
         return JSONResponse(status_code=404, content={"success": False, "message": "Batch expired."})
         
-    updates_map = {item.id: item.tags for item in payload.items}
-    
-    for item in PENDING_BATCHES[payload.batch_id]["items"]:
-        if not item.get("success") or item.get("is_duplicate"): continue
-        
-        recipe_data = item['data']
-        if item['id'] in updates_map:
-             recipe_data['tags'] = updates_map[item['id']] # Update tags with user edits
+    items = batch['items']
+    total = len([i for i in items if i.get("success") and not i.get("is_duplicate")])
+    if not BATCHES.advance(payload.batch_id, "committing", expected="review", total=total, done=0, failed=0):
+        return JSONResponse(status_code=409, content={"success": False, "message": "Batch is not ready to import."})
 
-        success, _, saved_meta = process_and_save_recipe(recipe_data)
-        if success: update_taxonomy_counters(new_tags=saved_meta['tags'])
+    updates_map = {item.id: item.tags for item in payload.items}
+    JOB_POOL.submit(run_batch_job, run_commit_job, payload.batch_id, items, updates_map)
+    return {"success": True, "batch_id": payload.batch_id}
 
-    del PENDING_BATCHES[payload.batch_id]
-    trigger_hugo_rebuild()
-    time.sleep(2.0)
+@app.post("/bulk-cancel")
+def bulk_cancel(batch_id: str = Form(...)):
+    BATCHES.discard(batch_id)
     return {"success": True}
 
 @app.post("/test-image")
-def test_image_availability(url: str = Form(...), source_url: str = Form(None)):
+def test_image_availability(url: str = Form(...), source_url: str = Form(None), warm: bool = Form(False)):
     if not is_safe_url(url): return {"success": False}
-    return {"success": bool(download_image_with_fallback(url, source_url))}
+    
+    cached = IMAGE_CACHE.lookup_url(url)
+    info = read_image_header([cached]) if cached else probe_image(url, source_url)
+    if not info: return {"success": False}
+    
+    body = info.pop("body", None)
+    if body and not cached: IMAGE_CACHE.store_original(body, url=url)
+    elif warm and not body and not cached:
+        # Fetch the rest in the background so the following /save finds it in the cache
+        SCRAPE_POOL.submit(download_image_with_fallback, url, source_url)
+    return {"success": True, **info}
+
+@app.get("/search")
+def search_recipes(request: Request, q: str = "", tag: List[str] = Query([]), limit: int = 20):
+    wait_for_index()
+    query, tag_filters, exclude, exclude_tags = parse_search_query(q)
+    tag_filters += [t.strip().lower() for t in tag if t.strip()]
+    if query or tag_filters or exclude or exclude_tags:
+        results = RECIPE_INDEX.search(query, tag_filters, max(1, min(limit, 50)), exclude, exclude_tags)
+    else: results = []
+    return templates.TemplateResponse(request=request, name="search_results.html", context={"results": results, "query": q})
 
 @app.post("/delete")
 def delete_recipe(slug: str = Form(...)):
@@ -487,11 +2542,27 @@ def delete_recipe(slug: str = Form(...)):
     try:
         path = os.path.join(CONTENT_DIR, slug)
         if os.path.exists(path):
-            old_data = load_existing_recipe(slug)
+            removed_ns = time.time_ns()
             shutil.rmtree(path)
-            if old_data: update_taxonomy_counters(old_tags=old_data['raw_tags_list'])
-            trigger_hugo_rebuild()
-            time.sleep(1.5)
+            shutil.rmtree(source_dir(slug), ignore_errors=True)
+            RECIPE_INDEX.remove(slug)
+            RECIPE_CACHE.discard(slug)
+            unpublish_recipe(slug)
+            wait_for_publish(removed=True, since_ns=removed_ns)
             return RedirectResponse(url="/", status_code=303)
         return HTMLResponse("Recipe not found", status_code=404)
     except Exception as e: return HTMLResponse(str(e), status_code=500)
+
+STARTUP.record("import", STARTUP.since_start())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LocalToast ingester maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reencode = commands.add_parser("reencode", help="Re-render every recipe's covers with the current settings")
+    reencode.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Covers rendered in parallel (default: all cores)")
+    reencode.add_argument("--force", action="store_true", help="Also redo recipes already at the current settings")
+    args = parser.parse_args()
+    if args.command == "reencode":
+        IMAGE_WORKERS = max(1, args.workers)
+        try: reencode_covers(IMAGE_WORKERS, force=args.force)
+        finally: reset_image_pool()
@@ -0,0 +1,70 @@
+"""Fixtures for the ingester tests: main.py against throwaway folders and local stub sites."""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+os.chdir(SRC_DIR) # main.py loads its templates relative to the working directory
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The main module with empty content/data folders, no Hugo and 127.0.0.1 trusted."""
+    for name in ("recipes", "data", "public"): (tmp_path / name).mkdir()
+    monkeypatch.setattr(main, "CONTENT_DIR", str(tmp_path / "recipes"))
+    monkeypatch.setattr(main, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(main, "PUBLIC_DIR", str(tmp_path / "public"))
+    monkeypatch.setattr(main, "PUBLISH_TIMEOUT", 0)
+    monkeypatch.setattr(main, "RESOLVER", main.SafeResolver(main.DNS_TTL, main.DNS_NEGATIVE_TTL, {"127.0.0.1"}))
+    monkeypatch.setattr(main, "RECIPE_INDEX", main.RecipeIndex())
+    monkeypatch.setattr(main, "RECIPE_CACHE", main.RecipeCache(main.RECIPE_CACHE_SIZE))
+    monkeypatch.setattr(main, "IMAGE_CACHE", main.ImageCache(main.IMAGE_CACHE_MAX_BYTES, main.IMAGE_URL_TTL))
+    monkeypatch.setattr(main, "PAGE_CACHE", main.PageCache(main.PAGE_CACHE_MAX_BYTES, main.PAGE_CACHE_TTL))
+    monkeypatch.setattr(main, "COVER_LOG", main.CoverLog())
+    monkeypatch.setattr(main, "BATCHES", main.BatchStore(main.BATCH_TIMEOUT, main.MAX_BATCHES))
+    main.TAG_INDEX.reset({})
+    yield main
+
+
+@pytest.fixture
+def client(app):
+    """Test client without the startup event (no background warm-up)."""
+    from fastapi.testclient import TestClient
+    return TestClient(app.app)
+
+
+@pytest.fixture
+def serve():
+    """Starts a stub site: serve(host, handler(request) -> (status, headers, body)). Returns its base URL."""
+    servers = []
+
+    def start(host, respond):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+
+            def do_GET(self):
+                status, headers, body = respond(self)
+                self.send_response(status)
+                for name, value in headers.items(): self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://{host}:{server.server_address[1]}"
+
+    yield start
+    for server in servers: server.shutdown()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    main.reset_image_pool()
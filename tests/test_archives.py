@@ -0,0 +1,58 @@
+import io
+import os
+import tarfile
+
+from PIL import Image
+
+
+def save_recipe(client, title, tags):
+    buf = io.BytesIO()
+    Image.new("RGB", (900, 700), "red").save(buf, "JPEG")
+    response = client.post(
+        "/save",
+        data={"title": title, "tags": tags, "ingredients": "1 cup flour", "instructions": "Bake."},
+        files={"file": ("cover.jpg", buf.getvalue(), "image/jpeg")},
+    )
+    assert response.json()["success"]
+
+
+def test_export_import_round_trip(app, client, tmp_path, monkeypatch):
+    save_recipe(client, "Alpha", "dinner, shared")
+    save_recipe(client, "Beta", "lunch, shared")
+
+    exported = client.get("/export")
+    assert exported.status_code == 200
+    archive = exported.content
+    names = tarfile.open(fileobj=io.BytesIO(archive)).getnames()
+    assert "recipes/alpha/index.md" in names and "recipes/beta/cover_source.jpg" in names
+
+    # Restore into an empty instance
+    (tmp_path / "restored").mkdir()
+    (tmp_path / "restored-data").mkdir()
+    monkeypatch.setattr(app, "CONTENT_DIR", str(tmp_path / "restored"))
+    monkeypatch.setattr(app, "DATA_DIR", str(tmp_path / "restored-data"))
+    monkeypatch.setattr(app, "RECIPE_INDEX", app.RecipeIndex())
+    app.RECIPE_INDEX.load_tags(force=True)
+
+    chunks = (archive[i:i + 65536] for i in range(0, len(archive), 65536))
+    response = client.post("/import", content=chunks)
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "imported": 2, "skipped": [], "invalid": {}}
+    assert sorted(os.listdir(tmp_path / "restored")) == ["alpha", "beta"]
+    assert app.TAG_INDEX.counts() == {"dinner": 1, "lunch": 1, "shared": 2}
+    assert os.listdir(app.source_dir("beta")) == ["cover_source.jpg"]
+    assert "cover_source.jpg" not in os.listdir(tmp_path / "restored" / "beta")
+
+    response = client.post("/import", content=archive)
+    assert response.json()["skipped"] == ["alpha", "beta"]
+
+    response = client.post("/import?replace=true", content=archive)
+    assert response.json()["imported"] == 2
+    assert app.TAG_INDEX.counts() == {"dinner": 1, "lunch": 1, "shared": 2}
+
+    response = client.post("/import", content=b"not a tar archive" * 100)
+    assert response.status_code == 400
+    assert response.json()["success"] is False
+    response = client.post("/import", content=archive[:len(archive) // 2])
+    assert response.status_code == 400
+    assert sorted(os.listdir(tmp_path / "restored")) == ["alpha", "beta"]
@@ -0,0 +1,148 @@
+import os
+from io import BytesIO
+
+import pytest
+
+from PIL import Image
+
+from test_archives import save_recipe
+
+
+def jpeg_bytes(size=(64, 48)):
+    buf = BytesIO()
+    Image.new("RGB", size, "red").save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def test_redirect_to_private_address_is_not_fetched(app, serve):
+    """A trusted site redirecting to an internal address must not get it fetched by Requests or Curl."""
+    hits = []
+    internal = serve("127.0.0.2", lambda req: hits.append(req.path) or (200, {"Content-Type": "image/jpeg"}, jpeg_bytes()))
+    site = serve("127.0.0.1", lambda req: (302, {"Location": f"{internal}/latest/meta-data"}, b""))
+
+    assert app.download_image_with_fallback(f"{site}/cover.jpg") is None
+    assert app.probe_image(f"{site}/cover.jpg") is None
+    assert hits == []
+
+
+def test_image_download_from_trusted_site(app, serve):
+    site = serve("127.0.0.1", lambda req: (200, {"Content-Type": "image/jpeg"}, jpeg_bytes()))
+
+    assert app.download_image_with_fallback(f"{site}/cover.jpg") == jpeg_bytes()
+    assert app.probe_image(f"{site}/cover.jpg")["width"] == 64
+
+
+def test_concurrent_writers_of_the_same_files(app, tmp_path):
+    """Two caches (as in two workers) storing the same cover set and file at once must both succeed."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    caches = [app.ImageCache(app.IMAGE_CACHE_MAX_BYTES, app.IMAGE_URL_TTL) for _ in range(2)]
+    files = {"cover.jpg": jpeg_bytes(), "cover.webp": b"x" * 50000}
+    target = tmp_path / "cover.jpg"
+
+    def store(i):
+        path = caches[i % 2].store_renditions(f"digest{i // 2}", "settings", files)
+        app.write_atomic(str(target), files["cover.webp"])
+        app.link_or_copy(str(tmp_path / "cover.jpg"), str(tmp_path / "linked.jpg"))
+        return path
+
+    with ThreadPoolExecutor(max_workers=8) as pool: paths = list(pool.map(store, range(40)))
+
+    assert all(paths)
+    assert target.read_bytes() == files["cover.webp"]
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_reencode_keeps_legacy_pixels_and_never_upscales(app, monkeypatch):
+    """A legacy bundle's cover.jpg becomes its source once; sizes bigger than the source aren't produced."""
+    monkeypatch.setattr(app, "COVER_SIZES", [("", 800, 600, 80, 80), ("_large", 1600, 1200, 80, 80)])
+    bundle = os.path.join(app.CONTENT_DIR, "toast")
+    os.makedirs(bundle)
+    legacy = jpeg_bytes((800, 600))
+    with open(os.path.join(bundle, "cover.jpg"), "wb") as f: f.write(legacy)
+
+    counts, _, _ = app.reencode_covers(1)
+    assert counts["done"] == 1
+    source = os.path.join(app.source_dir("toast"), "cover_source.jpg")
+    with open(source, "rb") as f: assert f.read() == legacy
+    assert Image.open(os.path.join(bundle, "cover.jpg")).size == (800, 600)
+    assert not os.path.exists(os.path.join(bundle, "cover_large.jpg"))
+
+    counts, _, _ = app.reencode_covers(1, force=True)
+    assert counts["done"] == 1
+    with open(source, "rb") as f: assert f.read() == legacy
+
+
+def test_cover_source_stays_out_of_the_bundle(app, client):
+    """Hugo publishes everything in a bundle, so the full-size original must live in DATA_DIR."""
+    save_recipe(client, "Toast", "breakfast")
+    bundle = os.path.join(app.CONTENT_DIR, "toast")
+    assert not [name for name in os.listdir(bundle) if name.startswith("cover_source.")]
+    assert os.listdir(app.source_dir("toast")) == ["cover_source.jpg"]
+
+    # Bundles from older versions hand theirs over on first use
+    os.replace(os.path.join(app.source_dir("toast"), "cover_source.jpg"), os.path.join(bundle, "cover_source.jpg"))
+    assert app.cover_source(bundle) == os.path.join(app.source_dir("toast"), "cover_source.jpg")
+    assert not os.path.exists(os.path.join(bundle, "cover_source.jpg"))
+
+    client.post("/delete", data={"slug": "toast"})
+    assert not os.path.exists(app.source_dir("toast"))
+
+
+def test_on_demand_renditions_are_only_published(app, client):
+    """A first view writes into the published folder, never the bundle Hugo watches."""
+    save_recipe(client, "Toast", "breakfast")
+    bundle = os.path.join(app.CONTENT_DIR, "toast")
+    files = sorted(os.listdir(bundle))
+
+    response = client.get("/recipes/toast/cover_320x240.webp")
+    assert response.status_code == 200
+    assert Image.open(BytesIO(response.content)).size == (320, 240)
+    assert sorted(os.listdir(bundle)) == files
+    published = os.path.join(app.PUBLIC_DIR, "recipes", "toast")
+    assert sorted(os.listdir(published)) == ["cover_320x240.jpg", "cover_320x240.webp"]
+
+
+def test_on_demand_renditions_never_upscale(app, client, monkeypatch):
+    """A 500x400 cover asked for at 1600x1200 gets the biggest listed size it covers, not an upscale."""
+    monkeypatch.setattr(app, "RENDITION_SIZES", {(320, 240), (640, 480), (1600, 1200)})
+    os.makedirs(app.source_dir("toast"))
+    os.makedirs(os.path.join(app.CONTENT_DIR, "toast"))
+    with open(os.path.join(app.source_dir("toast"), "cover_source.jpg"), "wb") as f: f.write(jpeg_bytes((500, 400)))
+
+    response = client.get("/recipes/toast/cover_1600x1200.jpg")
+    assert response.status_code == 200
+    assert Image.open(BytesIO(response.content)).size == (320, 240)
+    published = os.path.join(app.PUBLIC_DIR, "recipes", "toast")
+    assert os.path.samefile(os.path.join(published, "cover_1600x1200.webp"), os.path.join(published, "cover_320x240.webp"))
+
+    # No listed size fits: scale the framing down to the source
+    assert app.fitting_size(1600, 1200, 300, 200) == (266, 200)
+    assert app.fitting_size(640, 480, 500, 400) == (320, 240)
+    assert app.fitting_size(320, 240, 500, 400) == (320, 240)
+
+
+def test_unreachable_address_falls_back_to_the_next(app, serve):
+    """A dual-stack site whose first address can't be reached is fetched from its second one."""
+    def respond(req):
+        if req.headers.get("Accept-Language"): return 403, {}, b"" # Only Curl gets through
+        return 200, {"Content-Type": "image/jpeg"}, jpeg_bytes()
+    port = serve("127.0.0.1", lambda req: (200, {"Content-Type": "image/jpeg"}, jpeg_bytes())).rsplit(":", 1)[1]
+    curl_port = serve("127.0.0.1", respond).rsplit(":", 1)[1]
+    app.RESOLVER.trusted.add("dual.test")
+    app.RESOLVER._store("dual.test", ["127.0.0.2", "127.0.0.1"]) # Nothing listens on .2
+
+    assert app.download_image_with_fallback(f"http://dual.test:{port}/cover.jpg") == jpeg_bytes()
+    assert app.curl_pin_args(f"http://dual.test:{curl_port}/a.jpg") == ["--resolve", f"dual.test:{curl_port}:127.0.0.2,127.0.0.1"]
+    assert app.download_image_with_fallback(f"http://dual.test:{curl_port}/cover.jpg") == jpeg_bytes()
+
+
+def test_curl_fallback_for_sites_refusing_requests(app, serve):
+    def respond(req):
+        if req.headers.get("Accept-Language"): return 403, {}, b"" # Only Curl gets through
+        return 200, {"Content-Type": "image/jpeg"}, jpeg_bytes((640, 480))
+    site = serve("127.0.0.1", respond)
+
+    assert app.probe_image(f"{site}/cover.jpg")["width"] == 640
+    assert app.download_image_with_fallback(f"{site}/cover.jpg") == jpeg_bytes((640, 480))
+    with pytest.raises(app.FetchRejected): b"".join(app.curl_fetch(f"{site}/cover.jpg", max_bytes=1024))
@@ -0,0 +1,52 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_host_queue_keeps_pool_threads_free_for_other_hosts(app):
+    """URLs waiting on a busy site must not hold pool threads that another site could use."""
+    pool = ThreadPoolExecutor(max_workers=4)
+    hosts = app.HostQueue(pool, 1)
+    running, peak, started = {}, {}, []
+    lock = threading.Lock()
+
+    def fetch(host, i):
+        with lock:
+            running[host] = running.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), running[host])
+            started.append(host)
+        time.sleep(0.05)
+        with lock: running[host] -= 1
+        return host, i
+
+    futures = [hosts.submit(host, fetch, host, i) for host in ("a", "b") for i in range(6)]
+    assert [f.result(timeout=5) for f in futures] == [(host, i) for host in ("a", "b") for i in range(6)]
+    assert peak == {"a": 1, "b": 1}
+    assert started.index("b") < 2 # Site b didn't wait for a's queue to drain
+    assert hosts._hosts == {}
+    pool.shutdown()
+
+
+def test_host_queue_reports_errors(app):
+    pool = ThreadPoolExecutor(max_workers=2)
+    hosts = app.HostQueue(pool, 1)
+    failed = hosts.submit("a", lambda: 1 / 0)
+    after = hosts.submit("a", lambda: "ok")
+    assert isinstance(failed.exception(timeout=5), ZeroDivisionError)
+    assert after.result(timeout=5) == "ok"
+    pool.shutdown()
+
+
+def test_bulk_job_error_fails_the_batch(app, client, monkeypatch):
+    """A job that dies outside its per-item handling must end the batch, not leave the page polling."""
+    def broken(lines, on_item=None): raise RuntimeError("disk I/O error")
+    monkeypatch.setattr(app, "stage_urls", broken)
+    client.post("/bulk", data={"urls": "https://example.com/a\nhttps://example.com/b"})
+    batch_id = app.BATCHES._db().execute("SELECT id FROM batches").fetchone()[0]
+
+    for _ in range(100):
+        response = client.get("/bulk-status", params={"batch_id": batch_id})
+        if response.status_code != 200: break
+        time.sleep(0.05)
+    assert response.status_code == 500
+    assert response.json() == {"success": False, "message": "The import stopped unexpectedly: disk I/O error"}
@@ -0,0 +1,51 @@
+import pytest
+
+from test_archives import save_recipe
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("chicken", ('"chicken"*', [], "", [])),
+    ("chicken soup", ('"chicken" "soup"*', [], "", [])),
+    ("chicken OR beef", ('"chicken" OR "beef"*', [], "", [])),
+    ("chicken NOT beef", ('"chicken" NOT "beef"*', [], "", [])),
+    # NOT with nothing to subtract from excludes its term instead of vanishing
+    ("NOT chicken", ("", [], '"chicken"*', [])),
+    ("NOT chicken NOT beef soup", ('"soup"*', [], '"chicken" OR "beef"', [])),
+    ("soup NOT NOT chicken", ('"soup"', [], '"chicken"*', [])),
+    ("soup OR NOT chicken rice", ('"soup" "rice"*', [], '"chicken"', [])),
+    # Dangling operators at either end
+    ("AND OR soup", ('"soup"*', [], "", [])),
+    ("soup AND", ('"soup"*', [], "", [])),
+    ("soup NOT", ('"soup"*', [], "", [])),
+    ("OR", ("", [], "", [])),
+    # Phrases, prefixes and columns
+    ('"chicken soup" rice', ('"chicken soup" "rice"*', [], "", [])),
+    ('"chicken soup', ('"chicken soup"', [], "", [])),
+    ("chick*", ('"chick"*', [], "", [])),
+    ("title:soup ingredients:leek", ('title : "soup" ingredients : "leek"*', [], "", [])),
+    ('instructions:"slow cook"', ('instructions : "slow cook"', [], "", [])),
+    ("NOT title:soup", ("", [], 'title : "soup"*', [])),
+    ("unknown:soup", ('"unknown soup"*', [], "", [])),
+    # Tags are exact filters
+    ("tag:Dinner soup", ('"soup"*', ["dinner"], "", [])),
+    ('tags:"Main Course"', ("", ["main course"], "", [])),
+    ("soup NOT tag:vegan", ('"soup"*', [], "", ["vegan"])),
+    ("soup OR NOT tag:vegan", ('"soup"*', [], "", ["vegan"])),
+    ("tag: soup", ('"tag" "soup"*', [], "", [])),
+    ("", ("", [], "", [])),
+])
+def test_parse_search_query(app, text, expected):
+    assert app.parse_search_query(text) == expected
+
+
+def test_search_excludes_negated_terms(client):
+    save_recipe(client, "Chicken Soup", "dinner")
+    save_recipe(client, "Leek Soup", "vegan")
+    save_recipe(client, "Beef Stew", "dinner")
+
+    def found(q): return sorted(s for s in ("chicken-soup", "leek-soup", "beef-stew") if f"/recipes/{s}/" in client.get("/search", params={"q": q}).text)
+
+    assert found("NOT chicken") == ["beef-stew", "leek-soup"]
+    assert found("soup NOT chicken") == ["leek-soup"]
+    assert found("NOT tag:dinner") == ["leek-soup"]
+    assert found("soup NOT NOT chicken") == ["leek-soup"]
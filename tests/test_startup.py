@@ -0,0 +1,21 @@
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+
+def test_search_waits_for_the_startup_index_sync(app, monkeypatch):
+    """Requests served during warm-up must see the whole cookbook, not a half-synced index."""
+    os.makedirs(os.path.join(app.CONTENT_DIR, "slow-toast"))
+    with open(os.path.join(app.CONTENT_DIR, "slow-toast", "index.md"), "w") as f:
+        f.write("---\ntitle: Slow Toast\ntags: [breakfast]\n---\n## Ingredients\n- bread\n\n## Instructions\nToast.\n")
+    rebuild = app.rebuild_taxonomy_cache
+    def slow_rebuild():
+        time.sleep(0.5)
+        rebuild()
+    monkeypatch.setattr(app, "rebuild_taxonomy_cache", slow_rebuild)
+    monkeypatch.setattr(app, "STARTUP", app.StartupProfile(time.perf_counter()))
+
+    with TestClient(app.app) as client:
+        assert "/recipes/slow-toast/" in client.get("/search", params={"q": "toast"}).text
+        assert client.get("/tag-suggest", params={"q": "break"}).json()["tags"]
@@ -0,0 +1,255 @@
+"""LocalToast benchmark harness.
+
+Builds synthetic cookbooks under a temp CONTENT_DIR, serves canned recipe pages
+and images from local stub sites (no network), and times the ingester in-process:
+
+    startup       rebuild_taxonomy_cache() on a cold index and again on a warm one
+    edit          POST /edit latency, first load and repeat
+    save          POST /save with a new cover image each time
+    bulk          POST /bulk staging throughput
+    bulk_commit   POST /bulk-commit until every staged recipe is written
+
+The ingester's own startup profile (imports, warm-up) is saved as "cold_start".
+Hugo isn't running, so publish waits are skipped. Results are written as JSON so
+regressions show up when runs are compared across releases.
+
+Usage: python tools/benchmark.py [--sizes 1000,10000,50000] [--output benchmark.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+
+# Paths relative to this script
+script_dir = Path(__file__).parent.resolve()
+project_root = script_dir.parent
+src_dir = project_root / "src"
+
+TAG_POOL = ["dinner", "lunch", "breakfast", "dessert", "soup", "salad", "vegetarian", "vegan", "chicken", "beef",
+            "pork", "fish", "pasta", "baking", "quick", "slow cooker", "italian", "mexican", "indian", "thai"]
+WORDS = ["roasted", "garlic", "lemon", "herb", "spicy", "creamy", "smoky", "crispy", "tomato", "basil", "ginger",
+         "honey", "butter", "mushroom", "potato", "onion", "pepper", "cheese", "rice", "noodle", "bean", "curry"]
+
+# --- SYNTHETIC COOKBOOK ---
+def recipe_markdown(rng, n):
+    title = " ".join(rng.sample(WORDS, 3)).title() + f" {n}"
+    tags = rng.sample(TAG_POOL, rng.randint(1, 4)) + [f"tag {rng.randint(0, 2000)}"]
+    ingredients = [f"{rng.randint(1, 4)} cups {rng.choice(WORDS)}" for _ in range(rng.randint(5, 15))]
+    steps = " ".join(f"{rng.choice(WORDS).title()} the {rng.choice(WORDS)} for {rng.randint(2, 40)} minutes." for _ in range(8))
+    frontmatter = {"title": title, "date": "2024-01-01T00:00:00", "tags": tags, "image": "cover.jpg", "source_url": f"https://example.com/recipes/{n}"}
+    return "---\n" + json.dumps(frontmatter, indent=1) + "\n---\n\n## Ingredients\n" + \
+        "\n".join(f"- {i}" for i in ingredients) + "\n\n## Instructions\n" + steps + "\n"
+
+def build_cookbook(content_dir, size, seed):
+    """Writes `size` recipe bundles (index.md only; covers don't affect the timed paths)."""
+    rng = random.Random(seed)
+    slugs = []
+    for n in range(size):
+        slug = f"bench-recipe-{n}"
+        os.makedirs(os.path.join(content_dir, slug))
+        with open(os.path.join(content_dir, slug, "index.md"), "w") as f: f.write(recipe_markdown(rng, n))
+        slugs.append(slug)
+    return slugs
+
+# --- STUB RECIPE SITES ---
+def make_base_images(count=8):
+    from PIL import Image
+    images = []
+    for i in range(count):
+        img = Image.effect_noise((1600, 1200), 40 + i * 8).convert("RGB")
+        buf = BytesIO()
+        img.save(buf, "JPEG", quality=90)
+        images.append(buf.getvalue())
+    return images
+
+def recipe_page(host, path, n):
+    ld = {
+        "@context": "https://schema.org", "@type": "Recipe", "name": f"Stub Recipe {path.strip('/').replace('/', ' ')}",
+        "image": f"http://{host}/img/{n}.jpg",
+        "recipeIngredient": ["2 cups flour", "1 tsp salt", "3 eggs", "1 cup milk", "2 tbsp butter"],
+        "recipeInstructions": [{"@type": "HowToStep", "text": "Mix everything."}, {"@type": "HowToStep", "text": "Bake for 30 minutes."}],
+        "recipeCategory": "Dinner, Baking", "recipeCuisine": "Italian",
+    }
+    filler = "<p>" + "Lorem ipsum dolor sit amet. " * 400 + "</p>"
+    return f"<html><head><title>stub</title><script type='application/ld+json'>{json.dumps(ld)}</script></head><body>{filler}</body></html>"
+
+def start_stub_sites(hosts, latency, images):
+    """One server per loopback address, so the per-host scrape limit behaves like real sites."""
+    port = None
+    for host in hosts:
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+            def do_GET(self):
+                time.sleep(latency)
+                n = int("".join(c for c in self.path if c.isdigit()) or 0)
+                if self.path.startswith("/img/"):
+                    # Unique bytes per URL so every save decodes and encodes a "new" image
+                    body, content_type = images[n % len(images)] + f"bench-{n}".encode(), "image/jpeg"
+                else:
+                    body, content_type = recipe_page(self.headers.get("Host"), self.path, n).encode(), "text/html; charset=utf-8"
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        server = ThreadingHTTPServer((host, port or 0), Handler)
+        server.daemon_threads = True
+        port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return port
+
+# --- MEASUREMENT ---
+def summarize(samples):
+    """Latency summary in milliseconds."""
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"count": len(ordered), "mean_ms": statistics.fmean(ordered) * 1000, "p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": ordered[-1] * 1000}
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def wait_for_stage(client, batch_id, stage, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get("/bulk-status", params={"batch_id": batch_id}).json()
+        if status.get("stage") != stage: return status
+        time.sleep(0.05)
+    raise TimeoutError(f"Batch {batch_id} stuck in {stage}")
+
+def reset_state(main, root):
+    """Points the app at a fresh content and data directory."""
+    main.CONTENT_DIR = os.path.join(root, "content")
+    main.DATA_DIR = os.path.join(root, "data")
+    main.PUBLIC_DIR = os.path.join(root, "public")
+    for path in (main.CONTENT_DIR, main.DATA_DIR, main.PUBLIC_DIR): os.makedirs(path, exist_ok=True)
+    main.RECIPE_INDEX = main.RecipeIndex()
+    main.RECIPE_CACHE = main.RecipeCache(main.RECIPE_CACHE_SIZE)
+    main.IMAGE_CACHE = main.ImageCache(main.IMAGE_CACHE_MAX_BYTES, main.IMAGE_URL_TTL)
+    main.PAGE_CACHE = main.PageCache(main.PAGE_CACHE_MAX_BYTES, main.PAGE_CACHE_TTL)
+
+def run_size(main, client, size, args, base_url, run_id):
+    result = {"recipes": size}
+    with tempfile.TemporaryDirectory(prefix=f"localtoast-bench-{size}-") as root:
+        reset_state(main, root)
+        gen_time, slugs = timed(lambda: build_cookbook(main.CONTENT_DIR, size, args.seed))
+        result["generate_s"] = gen_time
+        print(f"[{size}] generated cookbook in {gen_time:.1f}s", flush=True)
+
+        # Startup: cold parses every bundle, warm only stats them
+        cold, _ = timed(main.rebuild_taxonomy_cache)
+        main.RECIPE_INDEX = main.RecipeIndex()
+        warm, _ = timed(main.rebuild_taxonomy_cache)
+        result["startup"] = {"cold_s": cold, "warm_s": warm}
+        print(f"[{size}] startup cold {cold:.2f}s, warm {warm:.2f}s", flush=True)
+
+        # /edit: the first load parses the file, repeats should hit the recipe cache
+        rng = random.Random(args.seed)
+        picks = [rng.choice(slugs) for _ in range(args.edits)]
+        first = [timed(lambda s=s: client.post("/edit", data={"slug": s}))[0] for s in picks]
+        repeat = [timed(lambda s=s: client.post("/edit", data={"slug": s}))[0] for s in picks]
+        result["edit"] = {"first": summarize(first), "repeat": summarize(repeat)}
+        print(f"[{size}] /edit p50 {result['edit']['first']['p50_ms']:.1f}ms first, {result['edit']['repeat']['p50_ms']:.1f}ms repeat", flush=True)
+
+        # /save with image download, resize and encode
+        saves = []
+        for i in range(args.saves):
+            form = {"title": f"Bench Save {run_id} {size} {i}", "image_url": f"{base_url(i)}/img/{size * 1000 + i}.jpg",
+                    "tags": "dinner, bench", "ingredients": "1 cup flour\n2 eggs", "instructions": "Mix and bake."}
+            elapsed, response = timed(lambda: client.post("/save", data=form))
+            if response.status_code != 200: raise RuntimeError(f"/save failed: {response.text}")
+            saves.append(elapsed)
+        result["save"] = summarize(saves)
+        print(f"[{size}] /save p50 {result['save']['p50_ms']:.0f}ms", flush=True)
+
+        # /bulk staging and commit, spread over the stub hosts
+        urls = [f"{base_url(i)}/recipe/{run_id}/{size}/{i}" for i in range(args.bulk)]
+        start = time.perf_counter()
+        page = client.post("/bulk", data={"urls": "\n".join(urls)})
+        batch_id = page.text.split('id="batchId" value="')[1].split('"')[0]
+        staged = wait_for_stage(client, batch_id, "staging")
+        staging = time.perf_counter() - start
+        result["bulk"] = {"urls": len(urls), "seconds": staging, "urls_per_s": len(urls) / staging, "failed": staged.get("failed", 0)}
+        print(f"[{size}] /bulk {len(urls)} urls in {staging:.2f}s ({len(urls) / staging:.1f}/s)", flush=True)
+
+        items = [{"id": i["id"], "tags": i["tags"]} for i in main.BATCHES.get(batch_id)["items"] if i.get("success") and not i.get("is_duplicate")]
+        start = time.perf_counter()
+        client.post("/bulk-commit", json={"batch_id": batch_id, "items": items})
+        committed = wait_for_stage(client, batch_id, "committing")
+        commit = time.perf_counter() - start
+        result["bulk_commit"] = {"recipes": len(items), "seconds": commit, "recipes_per_s": len(items) / commit if commit else None, "failed": committed.get("failed", 0)}
+        print(f"[{size}] /bulk-commit {len(items)} recipes in {commit:.2f}s", flush=True)
+    return result
+
+def git_revision():
+    try: return subprocess.run(["git", "rev-parse", "HEAD"], cwd=project_root, capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except OSError: return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LocalToast ingester against synthetic cookbooks.")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma separated cookbook sizes")
+    parser.add_argument("--edits", type=int, default=200, help="/edit requests per size")
+    parser.add_argument("--saves", type=int, default=20, help="/save requests per size")
+    parser.add_argument("--bulk", type=int, default=50, help="URLs per /bulk batch")
+    parser.add_argument("--hosts", type=int, default=4, help="Stub sites (loopback addresses) to spread bulk URLs over")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each stub response is delayed")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="benchmark.json", help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:
+        sys.exit("Error: Missing dependencies. Run: pip install -r src/requirements.txt httpx")
+
+    # main.py loads its templates relative to the working directory
+    args.output = os.path.abspath(args.output)
+    os.chdir(src_dir)
+    sys.path.insert(0, str(src_dir))
+    os.environ.setdefault("LOCALTOAST_DATA_DIR", tempfile.mkdtemp(prefix="localtoast-bench-data-"))
+    import main as app_module
+
+    hosts = [f"127.0.0.{i + 1}" for i in range(args.hosts)]
+    app_module.RESOLVER.trusted.update(hosts)
+    app_module.PUBLISH_TIMEOUT = 0
+    # The stub sites aren't domains recipe_scrapers knows, so use its generic schema.org scraper
+    scrape_html = app_module.scrape_html
+    app_module.scrape_html = lambda html, org_url: scrape_html(html, org_url=org_url, supported_only=False)
+
+    port = start_stub_sites(hosts, args.latency, make_base_images())
+    base_url = lambda i: f"http://{hosts[i % len(hosts)]}:{port}"
+    run_id = int(time.time())
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(), "revision": git_revision(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "sizes": {},
+    }
+    with TestClient(app_module.app) as client:
+        # Let the background warm-up finish so it doesn't overlap the first size
+        app_module.STARTUP.warmed.wait()
+        results["cold_start"] = app_module.STARTUP.report()
+        for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            results["sizes"][str(size)] = run_size(app_module, client, size, args, base_url, run_id)
+    app_module.reset_image_pool()
+
+    with open(args.output, "w") as f: json.dump(results, f, indent=2)
+    print(f"Done. Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()